@@ -5,8 +5,11 @@ import re
 
 from typing import List
 
+from framenet_tools.data_handler.corpus_cache import CorpusCache
 from framenet_tools.data_handler.frame_embedding_manager import FrameEmbeddingManager
+from framenet_tools.data_handler.oov_table import OOVTable
 from framenet_tools.data_handler.word_embedding_manager import WordEmbeddingManager
+from framenet_tools.utils.resource_registry import get_resource
 from framenet_tools.utils.static_utils import download_resources, get_spacy_en_model
 
 
@@ -25,6 +28,13 @@ class ConfigManager(object):
     use_cuda: bool
     use_spacy: bool
     syntax_only_mode: bool
+    filter_embeddings: bool
+    binary_embeddings: bool
+    num_workers: int
+    embedding_precision: str
+    use_corpus_cache: bool
+    corpus_cache_dir: str
+    corpus_cache_size: int
 
     hidden_sizes: List[int]
     activation_functions: List[str]
@@ -53,6 +63,14 @@ class ConfigManager(object):
         self.use_cuda = True
         self.use_spacy = True
         self.syntax_only_mode = True
+        self.filter_embeddings = True
+        self.binary_embeddings = True
+        # More processes rarely pay off, as every process holds its own share of the data
+        self.num_workers = min(4, os.cpu_count() or 1)
+        self.embedding_precision = "float32"
+        self.use_corpus_cache = False
+        self.corpus_cache_dir = "data/corpus_cache/"
+        self.corpus_cache_size = 1024
 
         self.hidden_sizes = [512, 0.2, 256, 0.1]
         self.activation_functions = ["ReLU", "Dropout", "ReLU", "Dropout"]
@@ -75,8 +93,38 @@ class ConfigManager(object):
             get_spacy_en_model()
             self.create_config('config.file')
 
-        self.wEM = WordEmbeddingManager()
-        self.fEM = FrameEmbeddingManager()
+        # NOTE: The embeddings are shared by all ConfigManagers of the process
+        word_embeddings = "data/word_embeddings/levy_deps_300.w2vt"
+        frame_embeddings = "data/frame_embeddings/dict_frame_to_emb_100dim_wsb"
+
+        self.wEM = get_resource(
+            "word_embeddings",
+            os.path.abspath(word_embeddings) + ":" + self.embedding_precision,
+            lambda: WordEmbeddingManager(
+                word_embeddings,
+                self.binary_embeddings,
+                self.num_workers,
+                self.embedding_precision,
+            ),
+        )
+        self.fEM = get_resource(
+            "frame_embeddings",
+            os.path.abspath(frame_embeddings),
+            lambda: FrameEmbeddingManager(
+                frame_embeddings, self.binary_embeddings, self.num_workers
+            ),
+        )
+
+        # On-disk cache of parsed corpora, None if disabled
+        self.corpus_cache = None
+
+        if self.use_corpus_cache:
+            self.corpus_cache = CorpusCache(self.corpus_cache_dir, self.corpus_cache_size)
+
+        # Shared vectors for words and frames without an embedding
+        self.oov_table = get_resource(
+            "oov_table", str(self.embedding_size), lambda: OOVTable(self.embedding_size)
+        )
 
     def load_defaults(self):
         """
@@ -171,6 +219,27 @@ class ConfigManager(object):
                     if key == "syntax_only_mode":
                         self.syntax_only_mode = config[section][key] == "True"
 
+                    if key == "filter_embeddings":
+                        self.filter_embeddings = config[section][key] == "True"
+
+                    if key == "binary_embeddings":
+                        self.binary_embeddings = config[section][key] == "True"
+
+                    if key == "num_workers":
+                        self.num_workers = int(config[section][key])
+
+                    if key == "embedding_precision":
+                        self.embedding_precision = config[section][key]
+
+                    if key == "use_corpus_cache":
+                        self.use_corpus_cache = config[section][key] == "True"
+
+                    if key == "corpus_cache_dir":
+                        self.corpus_cache_dir = config[section][key]
+
+                    if key == "corpus_cache_size":
+                        self.corpus_cache_size = int(config[section][key])
+
                     if key == "autostopper":
                         self.autostopper = config[section][key] == "True"
 
@@ -274,6 +343,13 @@ class ConfigManager(object):
         config_string += "use_cuda: " + str(self.use_cuda) + "\n"
         config_string += "use_spacy: " + str(self.use_spacy) + "\n"
         config_string += "syntax_only_mode: " + str(self.syntax_only_mode) + "\n"
+        config_string += "filter_embeddings: " + str(self.filter_embeddings) + "\n"
+        config_string += "binary_embeddings: " + str(self.binary_embeddings) + "\n"
+        config_string += "num_workers: " + str(self.num_workers) + "\n"
+        config_string += "embedding_precision: " + self.embedding_precision + "\n"
+        config_string += "use_corpus_cache: " + str(self.use_corpus_cache) + "\n"
+        config_string += "corpus_cache_dir: " + self.corpus_cache_dir + "\n"
+        config_string += "corpus_cache_size: " + str(self.corpus_cache_size) + "\n"
         config_string += "autostopper: " + str(self.autostopper) + "\n"
         config_string += "autostopper_threshold: " + str(self.autostopper_threshold) + "\n"
 
@@ -1,38 +1,233 @@
+from array import array
+from hashlib import blake2b
 from typing import List, Tuple
 
+from framenet_tools.data_handler.symbol_table import symbol_table
+
 
 class Annotation(object):
     """
     Annotation class
 
     Saves and manages all data of one frame for a given sentence.
+
+    NOTE: To keep millions of annotations compact, the class uses __slots__,
+          all strings are interned in the shared symbol table and the positions
+          and roles (as ids of the symbol table) are packed into a single int array.
+          Lists returned by the properties are created on access,
+          changes therefore have to be assigned to the property again!
     """
 
+    __slots__ = [
+        "_frame",
+        "_fee",
+        "_fee_raw",
+        "_positions",
+        "_frame_confidence",
+        "_sentence",
+        "embedded_frame",
+    ]
+
     def __init__(
         self,
         frame: str = "Default",
         fee: str = None,
-        position: int = None,
+        position: Tuple[int, int] = None,
         fee_raw: str = None,
-        sentence: List[str] = [],
-        roles: List[str] = [],
-        role_positions: List[Tuple[int, int]] = []
+        sentence: List[str] = None,
+        roles: List[str] = None,
+        role_positions: List[Tuple[int, int]] = None,
     ):
+        if sentence is None:
+            sentence = []
+
+        # The FEE position, the number of role spans, the start and end of every span
+        # and the ids of the roles
+        self._positions = array("i", [-1, -1, 0])
+
         self.frame = frame
         self.fee = fee
-        self.position = position
         self.fee_raw = fee_raw
         self.sentence = sentence
-        self.roles = roles
-        self.role_positions = role_positions
+        self.roles = [] if roles is None else roles
         self.embedded_frame = None
-        self.frame_confidence = [[frame, 1.0]]
+
+        # Derived from the frame, until explicitly set
+        self._frame_confidence = None
 
         if position is None:
-            self.position = (-1, -1)
             if fee_raw in sentence:
                 t = sentence.index(fee_raw)
-                self.position = (t, t)
+                position = (t, t)
+            else:
+                position = (-1, -1)
+
+        self.position = position
+        self.role_positions = [] if role_positions is None else role_positions
+
+    def __getstate__(self):
+        """
+        Returns the state for pickling (and copying)
+
+        NOTE: The ids of the roles are only valid inside of the process, the roles are saved by name.
+
+        :return: A tuple of the frame, fee, fee_raw, roles, positions (FEE followed by the role spans),
+                 frame_confidence, sentence and embedded frame
+        """
+
+        positions = self._positions
+        num_spans = positions[2]
+
+        return (
+            self._frame,
+            self._fee,
+            self._fee_raw,
+            tuple(self.roles),
+            positions[:2] + positions[3 : 3 + 2 * num_spans],
+            self._frame_confidence,
+            self._sentence,
+            self.embedded_frame,
+        )
+
+    def __setstate__(self, state: tuple):
+        """
+        Restores the state after unpickling, the strings are interned again.
+
+        :param state: The tuple of __getstate__
+        :return:
+        """
+
+        self._positions = array("i", [-1, -1, 0])
+        self._frame_confidence = None
+
+        if isinstance(state, dict):
+            # Pickled before the introduction of __slots__
+            for name, value in state.items():
+                setattr(self, name, value)
+
+            return
+
+        frame, fee, fee_raw, roles, positions, frame_confidence, sentence, embedded = state
+
+        self.frame = frame
+        self.fee = fee
+        self.fee_raw = fee_raw
+        self.position = (positions[0], positions[1])
+        self.role_positions = [
+            (positions[i], positions[i + 1]) for i in range(2, len(positions), 2)
+        ]
+        self.roles = roles
+        self._frame_confidence = frame_confidence
+        self._sentence = sentence
+        self.embedded_frame = embedded
+
+    def copy(self):
+        """
+        Creates a copy of the annotation
+
+        NOTE: The sentence, the embedded frame and the interned strings are shared with the copy,
+              only the packed positions are copied (as they are changed in place).
+
+        :return: The copy
+        """
+
+        annotation = object.__new__(Annotation)
+
+        for name in self.__slots__:
+            object.__setattr__(annotation, name, getattr(self, name))
+
+        annotation._positions = array("i", self._positions)
+
+        return annotation
+
+    @property
+    def frame(self):
+        return self._frame
+
+    @frame.setter
+    def frame(self, frame: str):
+        self._frame = symbol_table.intern(frame)
+
+    @property
+    def fee(self):
+        return self._fee
+
+    @fee.setter
+    def fee(self, fee: str):
+        self._fee = symbol_table.intern(fee)
+
+    @property
+    def fee_raw(self):
+        return self._fee_raw
+
+    @fee_raw.setter
+    def fee_raw(self, fee_raw: str):
+        self._fee_raw = symbol_table.intern(fee_raw)
+
+    @property
+    def roles(self):
+        positions = self._positions
+        get_symbol = symbol_table.get_symbol
+
+        return [get_symbol(i) for i in positions[3 + 2 * positions[2] :]]
+
+    @roles.setter
+    def roles(self, roles: List[str]):
+        positions = self._positions[: 3 + 2 * self._positions[2]]
+        positions.extend(symbol_table.get_id(role) for role in roles)
+
+        self._positions = positions
+
+    @property
+    def position(self):
+        return self._positions[0], self._positions[1]
+
+    @position.setter
+    def position(self, position: Tuple[int, int]):
+        self._positions[0] = position[0]
+        self._positions[1] = position[1]
+
+    @property
+    def role_positions(self):
+        positions = self._positions
+
+        return [
+            (positions[i], positions[i + 1])
+            for i in range(3, 3 + 2 * positions[2], 2)
+        ]
+
+    @role_positions.setter
+    def role_positions(self, role_positions: List[Tuple[int, int]]):
+        old = self._positions
+        positions = array("i", [old[0], old[1], len(role_positions)])
+
+        for start, end in role_positions:
+            positions.append(start)
+            positions.append(end)
+
+        # Keep the ids of the roles
+        positions.extend(old[3 + 2 * old[2] :])
+
+        self._positions = positions
+
+    @property
+    def sentence(self):
+        return self._sentence
+
+    @sentence.setter
+    def sentence(self, sentence: List[str]):
+        self._sentence = sentence
+
+    @property
+    def frame_confidence(self):
+        if self._frame_confidence is None:
+            return [[self._frame, 1.0]]
+
+        return self._frame_confidence
+
+    @frame_confidence.setter
+    def frame_confidence(self, frame_confidence: List[list]):
+        self._frame_confidence = frame_confidence
 
     def create_handle(self):
         """
@@ -44,16 +239,39 @@ class Annotation(object):
         """
         return [self.frame, self.position, self.fee_raw, self.sentence, self.roles, self.role_positions]
 
+    def get_fingerprint(self):
+        """
+        Returns a fingerprint of the data compared by __eq__ (see create_handle), e.g. for DataReader.diff
+
+        :return: The blake2b digest (16 bytes)
+        """
+
+        positions = self._positions
+
+        # NOTE: The roles are hashed by name, their ids are only valid inside of the process
+        digest = blake2b(digest_size=16)
+        digest.update(
+            repr(
+                (self._frame, self._fee_raw, tuple(self._sentence), tuple(self.roles))
+            ).encode("utf-8")
+        )
+        digest.update(positions[: 3 + 2 * positions[2]].tobytes())
+
+        return digest.digest()
+
     def __eq__(self, x):
         """
         The overwriting of the comparison function
 
+        NOTE: Compares the same data as the handles (see create_handle), without creating them.
+
         :param x: Another instance of this class
         :return: True if equal, otherwise false
         """
-        equal = True
-
-        for h1, h2 in zip(self.create_handle(), x.create_handle()):
-            equal &= h1 == h2
 
-        return equal
+        return (
+            self._frame == x._frame
+            and self._positions == x._positions
+            and self._fee_raw == x._fee_raw
+            and self._sentence == x._sentence
+        )
@@ -0,0 +1,441 @@
+import numpy as np
+
+from typing import List
+
+from framenet_tools.data_handler.annotation import Annotation
+
+
+"""
+Columnar (struct-of-arrays) representation of a corpus
+
+All tokens of all sentences are stored in one flat int32 array of token ids, sentence i spans
+token_array[sentence_offsets[i] : sentence_offsets[i + 1]].
+
+The annotations are stored as parallel arrays with one row per annotation, ordered by sentence.
+The annotations of sentence i are the rows annotation_offsets[i] up to annotation_offsets[i + 1].
+In the same way, the roles of annotation j are the rows role_offsets[j] up to role_offsets[j + 1]
+of the role arrays.
+
+Frames, roles and FEEs share one table of symbols, a missing symbol (None) has the id -1.
+Every role span has exactly one role id, spans without a role (e.g. predicted spans)
+have the id missing_role.
+
+NOTE: Use DataReader.to_columnar and DataReader.from_columnar for the conversion.
+"""
+
+
+# The role id of a span without a role (unlike -1, which is the id of the role None)
+missing_role = -2
+
+
+# The names of the arrays of a columnar corpus (e.g. for saving)
+array_names = [
+    "token_array",
+    "sentence_offsets",
+    "annotation_offsets",
+    "annotation_sentences",
+    "fee_positions",
+    "frame_ids",
+    "fee_ids",
+    "fee_raw_ids",
+    "role_offsets",
+    "role_ids",
+    "role_spans",
+]
+
+
+class ColumnarCorpus(object):
+    """
+    A corpus of sentences and annotations, stored as flat numpy arrays
+    """
+
+    def __init__(self):
+
+        # The vocab of the tokens
+        self.tokens = []
+        self.token_ids = dict()
+
+        # The vocab of the frames, roles and FEEs
+        self.symbols = []
+        self.symbol_ids = dict()
+
+        # Sentences
+        self.token_array = np.zeros(0, dtype=np.int32)
+        self.sentence_offsets = np.zeros(1, dtype=np.int64)
+
+        # Annotations
+        self.annotation_offsets = np.zeros(1, dtype=np.int64)
+        self.annotation_sentences = np.zeros(0, dtype=np.int32)
+        self.fee_positions = np.zeros((0, 2), dtype=np.int32)
+        self.frame_ids = np.zeros(0, dtype=np.int32)
+        self.fee_ids = np.zeros(0, dtype=np.int32)
+        self.fee_raw_ids = np.zeros(0, dtype=np.int32)
+
+        # Roles
+        self.role_offsets = np.zeros(1, dtype=np.int64)
+        self.role_ids = np.zeros(0, dtype=np.int32)
+        self.role_spans = np.zeros((0, 2), dtype=np.int32)
+
+    def __len__(self):
+
+        return len(self.sentence_offsets) - 1
+
+    def num_annotations(self):
+        """
+        Returns the number of annotations of the corpus
+
+        :return: The number of annotations
+        """
+
+        return len(self.frame_ids)
+
+    def get_token_id(self, token: str):
+        """
+        Returns the id of a token, unknown tokens are added to the vocab
+
+        :param token: The token
+        :return: The id of the token
+        """
+
+        if token not in self.token_ids:
+            self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+
+        return self.token_ids[token]
+
+    def get_symbol_id(self, symbol: str):
+        """
+        Returns the id of a symbol, unknown symbols are added to the vocab
+
+        :param symbol: The symbol (frame, role or FEE)
+        :return: The id of the symbol, -1 for None
+        """
+
+        if symbol is None:
+            return -1
+
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+        return self.symbol_ids[symbol]
+
+    def get_symbol(self, symbol_id: int):
+        """
+        Returns the symbol of an id
+
+        :param symbol_id: The id of the symbol
+        :return: The symbol, None for -1
+        """
+
+        if symbol_id < 0:
+            return None
+
+        return self.symbols[symbol_id]
+
+    def get_sentence_ids(self, i: int):
+        """
+        Returns the token ids of a single sentence
+
+        :param i: The index of the sentence
+        :return: A view of the token array
+        """
+
+        return self.token_array[self.sentence_offsets[i] : self.sentence_offsets[i + 1]]
+
+    def get_sentence(self, i: int):
+        """
+        Returns the words of a single sentence
+
+        :param i: The index of the sentence
+        :return: A list of words
+        """
+
+        tokens = self.tokens
+
+        return [tokens[t] for t in self.get_sentence_ids(i).tolist()]
+
+    def get_annotation_range(self, i: int):
+        """
+        Returns the rows of the annotations of a single sentence
+
+        :param i: The index of the sentence
+        :return: A range of annotation rows
+        """
+
+        return range(self.annotation_offsets[i], self.annotation_offsets[i + 1])
+
+    def get_role_range(self, j: int):
+        """
+        Returns the rows of the roles of a single annotation
+
+        :param j: The row of the annotation
+        :return: A range of role rows
+        """
+
+        return range(self.role_offsets[j], self.role_offsets[j + 1])
+
+    def get_fee_token_ids(self):
+        """
+        Returns the token ids at the (start) positions of the FEEs of all annotations
+
+        :return: An array with one token id per annotation, -1 if the annotation has no position
+        """
+
+        positions = self.fee_positions[:, 0]
+        valid = positions >= 0
+
+        fee_tokens = np.full(len(positions), -1, dtype=np.int32)
+        fee_tokens[valid] = self.token_array[
+            self.sentence_offsets[self.annotation_sentences[valid]] + positions[valid]
+        ]
+
+        return fee_tokens
+
+    def share_vocab(self, corpus: "ColumnarCorpus"):
+        """
+        Uses the vocab of the tokens and symbols of another corpus
+
+        NOTE: Only valid if the ids of this corpus refer to the same vocab!
+
+        :param corpus: The corpus to share the vocab with
+        :return:
+        """
+
+        self.tokens = corpus.tokens
+        self.token_ids = corpus.token_ids
+        self.symbols = corpus.symbols
+        self.symbol_ids = corpus.symbol_ids
+
+    def get_slice(self, start: int, end: int):
+        """
+        Returns the sentences start up to end (exclusive) and their annotations, as a new corpus.
+
+        NOTE: The vocab is shared with the slice, the arrays are views of the arrays of this corpus.
+
+        :param start: The index of the first sentence
+        :param end: The index after the last sentence
+        :return: The slice as a corpus
+        """
+
+        corpus = ColumnarCorpus()
+        corpus.share_vocab(self)
+
+        offsets = self.sentence_offsets
+        corpus.token_array = self.token_array[offsets[start] : offsets[end]]
+        corpus.sentence_offsets = offsets[start : end + 1] - offsets[start]
+
+        first, last = self.annotation_offsets[start], self.annotation_offsets[end]
+        corpus.annotation_offsets = self.annotation_offsets[start : end + 1] - first
+        corpus.annotation_sentences = self.annotation_sentences[first:last] - start
+        corpus.fee_positions = self.fee_positions[first:last]
+        corpus.frame_ids = self.frame_ids[first:last]
+        corpus.fee_ids = self.fee_ids[first:last]
+        corpus.fee_raw_ids = self.fee_raw_ids[first:last]
+
+        role_first, role_last = self.role_offsets[first], self.role_offsets[last]
+        corpus.role_offsets = self.role_offsets[first : last + 1] - role_first
+        corpus.role_ids = self.role_ids[role_first:role_last]
+        corpus.role_spans = self.role_spans[role_first:role_last]
+
+        return corpus
+
+    def append_sentences(self, sentences: List[List[str]]):
+        """
+        Appends sentences (without annotations) to the corpus
+
+        :param sentences: A list of sentences, each as a list of words
+        :return:
+        """
+
+        lengths = np.fromiter(
+            (len(sentence) for sentence in sentences),
+            dtype=np.int64,
+            count=len(sentences),
+        )
+        offsets = self.sentence_offsets[-1] + np.cumsum(lengths)
+
+        token_array = np.fromiter(
+            (self.get_token_id(word) for sentence in sentences for word in sentence),
+            dtype=np.int32,
+            count=int(lengths.sum()),
+        )
+
+        self.token_array = np.concatenate([self.token_array, token_array])
+        self.sentence_offsets = np.concatenate([self.sentence_offsets, offsets])
+
+        # The new sentences have no annotations yet
+        self.annotation_offsets = np.concatenate(
+            [
+                self.annotation_offsets,
+                np.full(len(sentences), self.annotation_offsets[-1], dtype=np.int64),
+            ]
+        )
+
+    def set_annotations(self, annotations: List[List[Annotation]]):
+        """
+        Replaces the annotations of the corpus
+
+        NOTE: The list may be shorter than the sentences, the remaining sentences are unannotated.
+              Spans without a role (e.g. predicted spans) get the role id missing_role,
+              roles exceeding the number of spans are dropped.
+
+        :param annotations: A list of annotations per sentence
+        :return:
+        """
+
+        if len(annotations) > len(self):
+            raise Exception("Found more lists of annotations than sentences!")
+
+        flat = [
+            (i, annotation)
+            for i, sentence_annotations in enumerate(annotations)
+            for annotation in sentence_annotations
+        ]
+        count = len(flat)
+
+        counts = np.bincount(
+            np.fromiter((i for i, _ in flat), dtype=np.int64, count=count),
+            minlength=len(self),
+        )
+        self.annotation_offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.annotation_offsets[1:])
+
+        self.annotation_sentences = np.repeat(
+            np.arange(len(self), dtype=np.int32), counts
+        )
+
+        get_id = self.get_symbol_id
+        self.frame_ids = np.fromiter(
+            (get_id(a.frame) for _, a in flat), dtype=np.int32, count=count
+        )
+        self.fee_ids = np.fromiter(
+            (get_id(a.fee) for _, a in flat), dtype=np.int32, count=count
+        )
+        self.fee_raw_ids = np.fromiter(
+            (get_id(a.fee_raw) for _, a in flat), dtype=np.int32, count=count
+        )
+        self.fee_positions = np.fromiter(
+            (p for _, a in flat for p in a.position), dtype=np.int32, count=2 * count
+        ).reshape(count, 2)
+
+        role_positions = [a.role_positions for _, a in flat]
+        role_counts = np.fromiter(
+            (len(positions) for positions in role_positions),
+            dtype=np.int64,
+            count=count,
+        )
+        num_roles = int(role_counts.sum())
+
+        self.role_offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(role_counts, out=self.role_offsets[1:])
+
+        self.role_spans = np.fromiter(
+            (p for positions in role_positions for span in positions for p in span),
+            dtype=np.int32,
+            count=2 * num_roles,
+        ).reshape(num_roles, 2)
+
+        role_ids = []
+
+        for (_, annotation), positions in zip(flat, role_positions):
+            # Exactly one id per span, roles without a span can not be represented
+            roles = annotation.roles[: len(positions)]
+            role_ids += [get_id(role) for role in roles]
+            role_ids += [missing_role] * (len(positions) - len(roles))
+
+        self.role_ids = np.asarray(role_ids, dtype=np.int32)
+
+    def create_annotations(self, sentences: List[List[str]]):
+        """
+        Creates the annotation objects of the corpus
+
+        :param sentences: The sentences of the corpus (shared with the annotations)
+        :return: A list of annotations per sentence
+        """
+
+        symbols = self.symbols + [None]
+
+        frames = [symbols[i] for i in self.frame_ids.tolist()]
+        fees = [symbols[i] for i in self.fee_ids.tolist()]
+        fee_raws = [symbols[i] for i in self.fee_raw_ids.tolist()]
+        positions = self.fee_positions.tolist()
+
+        role_offsets = self.role_offsets.tolist()
+        role_ids = self.role_ids.tolist()
+        role_spans = [tuple(span) for span in self.role_spans.tolist()]
+
+        annotation_offsets = self.annotation_offsets.tolist()
+        annotations = []
+
+        for i, sentence in enumerate(sentences):
+            sentence_annotations = []
+
+            for j in range(annotation_offsets[i], annotation_offsets[i + 1]):
+                start, end = role_offsets[j], role_offsets[j + 1]
+
+                sentence_annotations.append(
+                    Annotation(
+                        frames[j],
+                        fees[j],
+                        tuple(positions[j]),
+                        fee_raws[j],
+                        sentence,
+                        [
+                            symbols[r]
+                            for r in role_ids[start:end]
+                            if r != missing_role
+                        ],
+                        role_spans[start:end],
+                    )
+                )
+
+            annotations.append(sentence_annotations)
+
+        return annotations
+
+
+def concatenate_offsets(offsets: List[np.ndarray]):
+    """
+    Concatenates multiple arrays of offsets (each starting at 0)
+
+    NOTE: Every array is shifted by the last offset of the previous ones.
+
+    :param offsets: The arrays of offsets
+    :return: The concatenated offsets
+    """
+
+    parts = [np.zeros(1, dtype=np.int64)]
+    shift = 0
+
+    for part in offsets:
+        parts.append(part[1:] + shift)
+        shift += part[-1]
+
+    return np.concatenate(parts)
+
+
+def concatenate_corpora(corpora: List[ColumnarCorpus]):
+    """
+    Concatenates multiple corpora, sharing the same vocab, into a single one
+
+    :param corpora: The corpora in order (at least one)
+    :return: The concatenated corpus
+    """
+
+    corpus = ColumnarCorpus()
+    corpus.share_vocab(corpora[0])
+
+    for name in ["sentence_offsets", "annotation_offsets", "role_offsets"]:
+        setattr(corpus, name, concatenate_offsets([getattr(p, name) for p in corpora]))
+
+    shifts = np.cumsum([0] + [len(part) for part in corpora[:-1]])
+    corpus.annotation_sentences = np.concatenate(
+        [part.annotation_sentences + shift for part, shift in zip(corpora, shifts)]
+    ).astype(np.int32)
+
+    for name in array_names:
+        if not name.endswith("_offsets") and name != "annotation_sentences":
+            setattr(corpus, name, np.concatenate([getattr(p, name) for p in corpora]))
+
+    return corpus
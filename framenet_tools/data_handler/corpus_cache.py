@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import os
+import pickle
+
+from typing import List
+
+
+"""
+On-disk cache of parsed corpora
+
+A parsed corpus (the content of a DataReader, see DataReader.to_cache_entry) is pickled into
+<cache_dir>/<key>.pkl. The key is derived from the paths, sizes, modification times and
+content hashes of the source files. Therefore a changed source file automatically misses the cache.
+Data added later (POS-tags, frame embeddings) is saved in entries of its own, see DataReader.update_cache.
+
+The cache is bounded by a maximum size, exceeding it evicts the least recently used entries.
+"""
+
+
+# The content hashes of the files already hashed by this process, by (path, size, mtime)
+file_hashes = dict()
+
+
+def get_file_hash(path: str):
+    """
+    Hashes the content of a file
+
+    NOTE: A file is only hashed once per process, as long as its size and mtime do not change.
+
+    :param path: The path of the file
+    :return: The sha1 hex digest of the content
+    """
+
+    stat = os.stat(path)
+    file_id = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    if file_id not in file_hashes:
+        sha1 = hashlib.sha1()
+
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha1.update(block)
+
+        file_hashes[file_id] = sha1.hexdigest()
+
+    return file_hashes[file_id]
+
+
+class CorpusCache(object):
+    """
+    A size bounded on-disk cache of parsed corpora
+
+    NOTE: Entries are written atomically, so multiple processes can share a cache directory.
+    """
+
+    def __init__(self, cache_dir: str = ".corpus_cache", max_size: int = 1024):
+
+        self.cache_dir = cache_dir
+
+        # Maximum size in MB
+        self.max_size = max_size
+
+    def get_key(self, paths: List[str], kind: str = "corpus"):
+        """
+        Creates the key of the corpus parsed from the given source files
+
+        :param paths: The paths of the source files
+        :param kind: The kind of the corpus (e.g. the name of the reader)
+        :return: The key
+        """
+
+        sha1 = hashlib.sha1(kind.encode("utf-8"))
+
+        for path in paths:
+            stat = os.stat(path)
+            source = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+            sha1.update(source.encode("utf-8"))
+            sha1.update(get_file_hash(path).encode("utf-8"))
+
+        return sha1.hexdigest()
+
+    def get_path(self, key: str):
+        """
+        Returns the path of the entry of the given key
+
+        :param key: The key of the entry
+        :return: The path of the entry
+        """
+
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def load(self, key: str):
+        """
+        Loads an entry from the cache
+
+        :param key: The key of the entry
+        :return: The entry, None if it is not cached
+        """
+
+        path = self.get_path(key)
+
+        try:
+            with open(path, "rb") as file:
+                entry = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+
+        logging.debug(f"Corpus cache hit: {key}")
+
+        return entry
+
+    def save(self, key: str, entry: dict):
+        """
+        Saves an entry to the cache, evicts old entries if the cache exceeds its size
+
+        NOTE: Entries larger than the whole cache are not saved.
+
+        :param key: The key of the entry
+        :param entry: The entry to save
+        :return:
+        """
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        path = self.get_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, "wb") as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        size = os.path.getsize(tmp_path)
+
+        if size > self.max_size * 1024 * 1024:
+            os.remove(tmp_path)
+
+            logging.warning(
+                f"Not caching {key}: the entry ({size / 1024 / 1024:.1f} MB) "
+                f"exceeds the cache size ({self.max_size} MB)"
+            )
+            return
+
+        os.replace(tmp_path, path)
+
+        logging.debug(f"Saved corpus cache entry: {key}")
+
+        self.evict(keep=os.path.basename(path))
+
+    def evict(self, keep: str = None):
+        """
+        Evicts the least recently used entries, until the cache does not exceed its size
+
+        :param keep: The file name of an entry to never evict (e.g. the one just saved)
+        :return:
+        """
+
+        entries = []
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        size = sum(entry[1] for entry in entries)
+
+        for _, entry_size, name in sorted(entries):
+            if size <= self.max_size * 1024 * 1024:
+                break
+
+            if name == keep:
+                continue
+
+            logging.debug(f"Evicting corpus cache entry: {name}")
+
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+            size -= entry_size
+
+    def clear(self):
+        """
+        Removes all entries from the cache
+
+        :return:
+        """
+
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,284 @@
+import logging
+import numpy as np
+import os
+
+from multiprocessing import get_context
+from typing import Set, Tuple
+
+
+"""
+Parallel parser for embedding text files
+
+The file is split into byte ranges, which are parsed independently by a pool of processes.
+A line belongs to the chunk in which it starts. Each chunk is converted with a single numpy call,
+instead of converting every value on its own. Lines that do not match the dimension of the
+first embedding of the file are skipped.
+
+Supported line formats:
+    - "w2v": <key> <value> <value> ... (as in .w2vt files, the first line is a header)
+    - "list": <key>\t[<value>, <value>, ...] (the former frame embedding text files)
+"""
+
+
+# The set of keys to keep in a worker, None keeps every key
+wanted_keys = None
+
+
+def init_worker(wanted: Set[str]):
+    """
+    Initializes a worker process
+
+    :param wanted: The set of keys to keep, None to keep all keys
+    :return:
+    """
+
+    global wanted_keys
+    wanted_keys = wanted
+
+
+def split_line(line: str, line_format: str):
+    """
+    Splits a line into its key and its values
+
+    :param line: The line to split
+    :param line_format: The format of the line ("w2v" or "list")
+    :return: A pair of the key and the values as a space separated string
+    """
+
+    if line_format == "w2v":
+        key, _, values = line.partition(" ")
+
+        return key, values
+
+    key, _, values = line.partition("\t")
+    values = values.replace("[", "").replace("]", "").replace(",", " ")
+
+    return key, values
+
+
+def parse_chunk(chunk: Tuple[str, int, int, str, int]):
+    """
+    Parses all lines starting inside of the given byte range
+
+    NOTE: Lines with the wrong number of values or values that are not numbers are skipped (and logged).
+
+    :param chunk: A tuple of the file path, the first byte, the end byte (exclusive),
+                  the line format and the dimension of the embeddings
+    :return: A pair of the keys and their embeddings
+    """
+
+    path, start, end, line_format, dim = chunk
+
+    keys = []
+    values = []
+    skipped = 0
+
+    with open(path, "rb") as file:
+        if start > 0:
+            # Skip the line which started in the previous chunk
+            file.seek(start - 1)
+            file.readline()
+
+        while file.tell() < end:
+            line = file.readline()
+
+            if not line:
+                break
+
+            key, line_values = split_line(line.decode("utf-8").rstrip(), line_format)
+
+            if line_values == "":
+                continue
+
+            if wanted_keys is not None and key not in wanted_keys:
+                continue
+
+            line_values = line_values.split()
+
+            if len(line_values) != dim:
+                skipped += 1
+                continue
+
+            keys.append(key)
+            values.append(line_values)
+
+    try:
+        matrix = np.array(values, dtype=np.float32).reshape(len(keys), dim)
+    except ValueError:
+        # Find the lines containing invalid numbers
+        valid = []
+
+        for i, line_values in enumerate(values):
+            try:
+                valid.append((keys[i], np.array(line_values, dtype=np.float32)))
+            except ValueError:
+                skipped += 1
+
+        keys = [key for key, _ in valid]
+        matrix = np.array([vector for _, vector in valid], dtype=np.float32)
+        matrix = matrix.reshape(len(keys), dim)
+
+    if skipped > 0:
+        logging.warning(
+            f"Skipped {skipped} invalid lines of {path} (bytes {start} to {end})"
+        )
+
+    if not keys:
+        return keys, None
+
+    return keys, matrix
+
+
+def get_chunks(path: str, line_format: str, num_chunks: int):
+    """
+    Splits a file into byte ranges
+
+    :param path: The path of the file
+    :param line_format: The format of the lines, "w2v" files start with a header
+    :param num_chunks: The number of chunks to split into
+    :return: A list of chunks, as used by parse_chunk
+    """
+
+    size = os.path.getsize(path)
+    start = 0
+
+    if line_format == "w2v":
+        with open(path, "rb") as file:
+            file.readline()
+            start = file.tell()
+
+    bounds = np.linspace(start, size, num_chunks + 1).astype(np.int64)
+    dim = read_dimension(path, line_format)
+
+    return [
+        (path, int(bounds[i]), int(bounds[i + 1]), line_format, dim)
+        for i in range(num_chunks)
+        if bounds[i] < bounds[i + 1]
+    ]
+
+
+def iter_embedding_chunks(
+    path: str,
+    line_format: str,
+    num_workers: int = 1,
+    wanted: Set[str] = None,
+    chunk_size: int = 16 * 1024 * 1024,
+):
+    """
+    Parses an embedding text file in chunks, using a pool of processes.
+
+    NOTE: The chunks are returned in the order of the file, chunks without an embedding are skipped.
+          Files of a single chunk are parsed without a pool, at most one process per chunk is used.
+          The pool uses the "spawn" start method, so it is safe to use after torch was loaded.
+
+    :param path: The path of the file
+    :param line_format: The format of the lines ("w2v" or "list")
+    :param num_workers: The number of processes to use
+    :param wanted: The set of keys to keep, None to keep all keys
+    :param chunk_size: The approximate size of a chunk in bytes
+    :return: A generator of pairs, each consisting of the keys and the embeddings of one chunk
+    """
+
+    num_chunks = os.path.getsize(path) // chunk_size + 1
+    chunks = get_chunks(path, line_format, num_chunks)
+
+    # A pool only pays off for files larger than a single chunk
+    num_workers = min(num_workers, len(chunks))
+
+    logging.debug(f"Parsing {path} in {len(chunks)} chunks using {num_workers} workers")
+
+    if num_workers <= 1:
+        init_worker(wanted)
+
+        try:
+            for chunk in chunks:
+                keys, matrix = parse_chunk(chunk)
+
+                if keys:
+                    yield keys, matrix
+        finally:
+            init_worker(None)
+
+        return
+
+    context = get_context("spawn")
+
+    with context.Pool(num_workers, initializer=init_worker, initargs=(wanted,)) as pool:
+        for keys, matrix in pool.imap(parse_chunk, chunks):
+            if keys:
+                yield keys, matrix
+
+
+def parse_embedding_file(
+    path: str, line_format: str, num_workers: int = 1, wanted: Set[str] = None
+):
+    """
+    Parses a complete embedding text file, see iter_embedding_chunks.
+
+    :param path: The path of the file
+    :param line_format: The format of the lines ("w2v" or "list")
+    :param num_workers: The number of processes to use
+    :param wanted: The set of keys to keep, None to keep all keys
+    :return: A pair of the keys and the embedding matrix
+    """
+
+    keys = []
+    matrices = []
+
+    for chunk_keys, matrix in iter_embedding_chunks(
+        path, line_format, num_workers, wanted
+    ):
+        keys += chunk_keys
+        matrices.append(matrix)
+
+    if not matrices:
+        return keys, None
+
+    return keys, np.concatenate(matrices)
+
+
+def read_dimension(path: str, line_format: str):
+    """
+    Reads the dimension of the embeddings from the first line containing an embedding.
+
+    :param path: The path of the file
+    :param line_format: The format of the lines ("w2v" or "list")
+    :return: The dimension, 0 if the file contains no embedding
+    """
+
+    with open(path, "r") as file:
+        if line_format == "w2v":
+            # Skip header
+            next(file, None)
+
+        for line in file:
+            _, values = split_line(line.rstrip(), line_format)
+
+            if values != "":
+                return len(values.split())
+
+    return 0
+
+
+def count_embeddings(path: str, line_format: str):
+    """
+    Counts the lines containing an embedding, without decoding the file.
+
+    :param path: The path of the file
+    :param line_format: The format of the lines ("w2v" or "list")
+    :return: The number of embeddings
+    """
+
+    separator = b" " if line_format == "w2v" else b"\t"
+    count = 0
+
+    with open(path, "rb") as file:
+        if line_format == "w2v":
+            # Skip header
+            file.readline()
+
+        for line in file:
+            if separator in line.strip():
+                count += 1
+
+    return count
@@ -0,0 +1,290 @@
+import logging
+import numpy as np
+import os
+
+from typing import List
+
+from framenet_tools.data_handler.quantization import get_dtype, quantize
+
+
+"""
+Binary storage of embedding tables
+
+An embedding table is saved as two files sharing the same base path:
+    - <base>.npy: the float32 matrix, one row per key
+    - <base>.vocab: the keys, one per line, in the order of the rows
+
+Stores of reduced precision (see quantization) are kept next to the float32 store, at <base>.<precision>.
+Their matrix is saved as float16 or int8, the latter with an additional <base>.<precision>.scale.npy.
+
+The matrix is opened memory-mapped, therefore loading is close to instant and
+only the rows that are actually looked up are read from disk.
+"""
+
+
+def get_store_paths(base_path: str):
+    """
+    Returns the paths of the files belonging to a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :return: A pair of the matrix path and the vocab path
+    """
+
+    return base_path + ".npy", base_path + ".vocab"
+
+
+def get_scale_path(base_path: str):
+    """
+    Returns the path of the row scales of a quantized (int8) embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :return: The path of the scales
+    """
+
+    return base_path + ".scale.npy"
+
+
+def get_precision_path(base_path: str, precision: str):
+    """
+    Returns the base path of the store of the given precision
+
+    :param base_path: The base path of the float32 store (without extension)
+    :param precision: The precision of the store
+    :return: The base path of the store
+    """
+
+    if precision == "float32":
+        return base_path
+
+    return base_path + "." + precision
+
+
+def store_exists(base_path: str):
+    """
+    Checks if a complete binary embedding store exists at the given base path
+
+    :param base_path: The base path of the store (without extension)
+    :return: True if both files of the store exist, otherwise False
+    """
+
+    matrix_path, vocab_path = get_store_paths(base_path)
+
+    return os.path.isfile(matrix_path) and os.path.isfile(vocab_path)
+
+
+def create_store_matrix(
+    base_path: str, num_rows: int, dim: int, dtype: np.dtype = np.float32
+):
+    """
+    Creates a new, writable memory-mapped matrix for a binary embedding store.
+
+    NOTE: The vocab (and the scales of int8 stores) have to be written separately!
+
+    :param base_path: The base path of the store (without extension)
+    :param num_rows: The number of keys
+    :param dim: The dimension of the embeddings
+    :param dtype: The dtype of the matrix
+    :return: The writable matrix
+    """
+
+    matrix_path, _ = get_store_paths(base_path)
+
+    upper_path = os.path.dirname(matrix_path)
+
+    if upper_path and not os.path.isdir(upper_path):
+        os.makedirs(upper_path)
+
+    return np.lib.format.open_memmap(
+        matrix_path, mode="w+", dtype=dtype, shape=(num_rows, dim)
+    )
+
+
+def truncate_store_matrix(base_path: str, num_rows: int, block_size: int = 65536):
+    """
+    Shrinks the matrix of a store to its first rows, e.g. if fewer rows were written than allocated.
+
+    NOTE: The rows are copied in blocks into a new file, which then replaces the matrix.
+
+    :param base_path: The base path of the store (without extension)
+    :param num_rows: The number of rows to keep
+    :param block_size: The number of rows copied at once
+    :return:
+    """
+
+    matrix_path, _ = get_store_paths(base_path)
+    tmp_path = f"{matrix_path}.{os.getpid()}.tmp"
+
+    matrix = np.load(matrix_path, mmap_mode="r")
+
+    if len(matrix) <= num_rows:
+        return
+
+    logging.debug(f"Truncating {matrix_path} from {len(matrix)} to {num_rows} rows")
+
+    with open(tmp_path, "wb") as file:
+        np.lib.format.write_array_header_1_0(
+            file,
+            {
+                "descr": np.lib.format.dtype_to_descr(matrix.dtype),
+                "fortran_order": False,
+                "shape": (num_rows, matrix.shape[1]),
+            },
+        )
+
+        for start in range(0, num_rows, block_size):
+            end = min(start + block_size, num_rows)
+            file.write(np.ascontiguousarray(matrix[start:end]).tobytes())
+
+    del matrix
+
+    os.replace(tmp_path, matrix_path)
+
+
+def write_store_scale(base_path: str, scale: np.ndarray):
+    """
+    Writes the row scales of a quantized (int8) embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :param scale: The scale of each row
+    :return:
+    """
+
+    np.save(get_scale_path(base_path), scale.astype(np.float32))
+
+
+def write_store_vocab(base_path: str, keys: List[str]):
+    """
+    Writes the keys of a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :param keys: The keys in the order of the rows of the matrix
+    :return:
+    """
+
+    _, vocab_path = get_store_paths(base_path)
+
+    with open(vocab_path, "w") as file:
+        for key in keys:
+            file.write(key + "\n")
+
+
+def write_store(
+    base_path: str, keys: List[str], matrix: np.ndarray, scale: np.ndarray = None
+):
+    """
+    Saves a complete embedding table as a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :param keys: The keys in the order of the rows of the matrix
+    :param matrix: The embeddings, one row per key
+    :param scale: The row scales of an int8 matrix, None otherwise
+    :return:
+    """
+
+    logging.debug(f"Writing embedding store: {base_path}")
+
+    store_matrix = create_store_matrix(
+        base_path, len(keys), matrix.shape[1], matrix.dtype
+    )
+    store_matrix[:] = matrix
+    store_matrix.flush()
+
+    del store_matrix
+
+    if scale is not None:
+        write_store_scale(base_path, scale)
+
+    write_store_vocab(base_path, keys)
+
+
+def read_store_vocab(base_path: str):
+    """
+    Reads the keys of a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :return: A list of keys in the order of the rows
+    """
+
+    _, vocab_path = get_store_paths(base_path)
+
+    with open(vocab_path, "r") as file:
+        keys = [line[:-1] for line in file]
+
+    return keys
+
+
+def open_store(base_path: str):
+    """
+    Opens a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :return: A pair of a dictionary (key -> row) and the memory-mapped matrix
+    """
+
+    logging.debug(f"Opening embedding store: {base_path}")
+
+    matrix_path, _ = get_store_paths(base_path)
+
+    keys = read_store_vocab(base_path)
+
+    # NOTE: Rows after the last key are unused (e.g. of skipped invalid lines)
+    matrix = np.load(matrix_path, mmap_mode="r")[: len(keys)]
+    index = {key: row for row, key in enumerate(keys)}
+
+    return index, matrix
+
+
+def read_store_scale(base_path: str):
+    """
+    Reads the row scales of a binary embedding store
+
+    :param base_path: The base path of the store (without extension)
+    :return: The memory-mapped scales, None if the store is not quantized to int8
+    """
+
+    scale_path = get_scale_path(base_path)
+
+    if not os.path.isfile(scale_path):
+        return None
+
+    return np.load(scale_path, mmap_mode="r")
+
+
+def quantize_store(base_path: str, precision: str, block_size: int = 65536):
+    """
+    Creates the store of the given precision from an existing float32 store.
+
+    NOTE: The rows are converted in blocks, the float32 matrix is never loaded completely.
+
+    :param base_path: The base path of the float32 store (without extension)
+    :param precision: The precision to convert to
+    :param block_size: The number of rows converted at once
+    :return:
+    """
+
+    logging.info(f"Converting embedding store {base_path} to {precision}")
+
+    precision_path = get_precision_path(base_path, precision)
+    matrix_path, _ = get_store_paths(base_path)
+
+    matrix = np.load(matrix_path, mmap_mode="r")
+    store_matrix = create_store_matrix(
+        precision_path, matrix.shape[0], matrix.shape[1], get_dtype(precision)
+    )
+    scales = []
+
+    for start in range(0, len(matrix), block_size):
+        block, scale = quantize(matrix[start : start + block_size], precision)
+        store_matrix[start : start + len(block)] = block
+
+        if scale is not None:
+            scales.append(scale)
+
+    store_matrix.flush()
+
+    del store_matrix
+
+    if scales:
+        write_store_scale(precision_path, np.concatenate(scales))
+
+    write_store_vocab(precision_path, read_store_vocab(base_path))
@@ -1,64 +1,84 @@
 import logging
+import numpy as np
+import os
 
-from tqdm import tqdm
+from typing import List
+
+from framenet_tools.data_handler.embedding_parser import parse_embedding_file
+from framenet_tools.data_handler.embedding_store import open_store, store_exists, write_store
+from framenet_tools.data_handler.oov_table import OOVTable
 
 
 class FrameEmbeddingManager(object):
     """
     Loads and provides the specified frame-embeddings
+
+    NOTE: The embeddings are stored as a binary store (see embedding_store), which is memory-mapped.
+          Stores are created from the original pickle files by download_frame_embeddings.
     """
 
     def __init__(
-        self, path: str = "data/frame_embeddings/dict_frame_to_emb_100dim_wsb_list.txt"
+        self,
+        path: str = "data/frame_embeddings/dict_frame_to_emb_100dim_wsb",
+        binary: bool = True,
+        num_workers: int = 1,
     ):
 
         self.path = path
+        self.binary = binary
+        self.num_workers = num_workers
+
+        # Mapping of frame -> row in vectors
         self.frames = None
+        self.vectors = None
 
-    def string_to_array(self, string: str):
+    def convert_frame_embeddings(self, txt_path: str):
         """
-        Helper function
-        Converts a string of an array back into an array
+        Converts a frame embedding file of the former text format into a binary store.
 
-        NOTE: specified for float arrays !!!
-
-        :param string: The string of an array
-        :return: The array
+        :param txt_path: The path of the text file
+        :return:
         """
 
-        array = []
+        logging.info(f"Converting frame embeddings to binary format")
+
+        frames, vectors = parse_embedding_file(txt_path, "list", self.num_workers)
 
-        string = string.replace("[", "")
-        string = string.replace("]", "")
-        string = string.rsplit(",")
+        if vectors is None:
+            raise Exception(f"Found no frame embeddings in {txt_path}!")
 
-        for element in string:
-            array.append(float(element))
+        write_store(self.path, frames, vectors)
 
-        return array
+        logging.info(f"[Done] converting frame embeddings")
 
     def read_frame_embeddings(self):
         """
-        Loads the previously specified frame embedding file into a dictionary
+        Loads the previously specified frame embeddings
+
+        NOTE: If only a file of the former text format ("_list.txt") exists, it is converted first,
+              unless binary is set to False. Then it is parsed on every load (in parallel).
         """
 
         if self.frames is not None:
             return
 
-        self.frames = dict()
+        txt_path = self.path + "_list.txt"
 
-        logging.info("Loading frame embeddings")
-
-        with open(self.path, "r") as file:
-            raw = file.read()
+        if not store_exists(self.path) and not os.path.isfile(txt_path):
+            raise Exception(f"Found no frame embeddings at {self.path}!")
 
-        data = raw.rsplit("\n")
+        logging.info("Loading frame embeddings")
 
-        for line in tqdm(data):
-            line = line.rsplit("\t")
+        if not self.binary and not store_exists(self.path):
+            frames, self.vectors = parse_embedding_file(
+                txt_path, "list", self.num_workers
+            )
+            self.frames = {frame: row for row, frame in enumerate(frames)}
+        else:
+            if not store_exists(self.path):
+                self.convert_frame_embeddings(txt_path)
 
-            if len(line) > 1:
-                self.frames[line[0]] = self.string_to_array(line[1])
+            self.frames, self.vectors = open_store(self.path)
 
         logging.info("[Done] loading frame embeddings")
 
@@ -71,6 +91,46 @@ class FrameEmbeddingManager(object):
         """
 
         if frame in self.frames:
-            return self.frames[frame]
+            return self.vectors[self.frames[frame]]
 
         return None
+
+    def embed_batch(self, frames: List[str], oov_table: OOVTable = None):
+        """
+        Converts a list of frames to their embeddings with a single gather
+
+        NOTE: Frames without an embedding are taken from the OOV table (or set to zero if none is given)
+
+        :param frames: The frames to embed
+        :param oov_table: The table to take the vectors of unknown frames from
+        :return: A pair of an array of the embeddings (one row per frame)
+                 and a boolean mask of the frames that have an embedding
+        """
+
+        dim = self.vectors.shape[1]
+        rows = np.fromiter(
+            (self.frames.get(frame, -1) for frame in frames),
+            dtype=np.int64,
+            count=len(frames),
+        )
+        found = rows >= 0
+
+        embedded = np.zeros((len(frames), dim), dtype=np.float32)
+        embedded[found] = self.vectors[rows[found]]
+
+        if oov_table is not None and not found.all():
+            missing = [frames[i] for i in np.flatnonzero(~found)]
+            embedded[~found] = oov_table.lookup_batch(missing, dim)
+
+        return embedded, found
+
+    def embed_many(self, frames: List[str], oov_table: OOVTable = None):
+        """
+        Converts a list of frames to their embeddings, see embed_batch
+
+        :param frames: The frames to embed
+        :param oov_table: The table to take the vectors of unknown frames from
+        :return: An array of the embeddings (one row per frame)
+        """
+
+        return self.embed_batch(frames, oov_table)[0]
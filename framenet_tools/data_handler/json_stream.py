@@ -0,0 +1,394 @@
+import gzip
+import io
+import json
+import numpy as np
+import re
+import sys
+
+from typing import List
+
+from framenet_tools.data_handler.annotation import Annotation
+
+
+"""
+Streaming (de-)serialization of predictions
+
+Besides the json format (one array of all sentences, see DataReader.export_to_json),
+predictions can be written as JSON Lines: one compact json object per line and sentence.
+These files can be written and read sentence by sentence, without holding the whole corpus.
+
+Files ending with ".gz" are gzip-compressed, files ending with ".zst" are zstd-compressed.
+
+NOTE: zstd requires the optional package "zstandard".
+"""
+
+
+# The whitespace and commas between the elements of a json array
+separator = re.compile(r"[\s,]*")
+
+
+def open_stream(path: str, mode: str = "r"):
+    """
+    Opens a (possibly compressed) text file, the compression is chosen by the extension
+
+    :param path: The path of the file
+    :param mode: Either "r" or "w"
+    :return: The text stream
+    """
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(
+                f"Reading or writing {path} requires zstd, please install 'zstandard'!"
+            )
+
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+
+    return io.open(path, mode, encoding="utf-8")
+
+
+def is_jsonl_path(path: str):
+    """
+    Checks if a path refers to a JSON Lines file (also if compressed)
+
+    :param path: The path of the file
+    :return: True if the (uncompressed) file ends with ".jsonl"
+    """
+
+    for extension in [".gz", ".zst"]:
+        if path.endswith(extension):
+            path = path[: -len(extension)]
+
+    return path.endswith(".jsonl")
+
+
+def is_json_path(path: str):
+    """
+    Checks if a path refers to an exported prediction file (json or JSON Lines, also if compressed)
+
+    :param path: The path of the file
+    :return: True if the (uncompressed) file ends with ".json" or ".jsonl"
+    """
+
+    for extension in [".gz", ".zst"]:
+        if path.endswith(extension):
+            path = path[: -len(extension)]
+
+    return path.endswith(".json") or path.endswith(".jsonl")
+
+
+def annotations_to_dict(annotations: List[Annotation], sentence_id: int):
+    """
+    Converts the annotations of a sentence into the exported format
+
+    :param annotations: The annotations of the sentence (at least one)
+    :param sentence_id: The id of the sentence
+    :return: The sentence and its predictions as a dictionary
+    """
+
+    data_dict = dict()
+
+    data_dict["sentence"] = annotations[0].sentence
+    data_dict["sentence_id"] = sentence_id
+    data_dict["prediction"] = []
+
+    frame_count = 0
+
+    for annotation in annotations:
+
+        prediction_dict = dict()
+        prediction_dict["id"] = frame_count
+        prediction_dict["fee"] = annotation.fee_raw
+        prediction_dict["frame"] = annotation.frame_confidence
+        prediction_dict["position"] = annotation.position[0]
+        prediction_dict["roles"] = []
+
+        role_id = 0
+
+        roles = annotation.roles
+
+        if not annotation.roles:
+            roles = ["Default"] * len(annotation.role_positions)
+
+        for span, role in zip(annotation.role_positions, roles):
+
+            span_dict = dict()
+            span_dict["role_id"] = role_id
+            span_dict["role"] = role
+            span_dict["span"] = span
+
+            role_id += 1
+
+            prediction_dict["roles"].append(span_dict)
+
+        data_dict["prediction"].append(prediction_dict)
+        frame_count += 1
+
+    return data_dict
+
+
+def dict_to_annotations(data_pair: dict):
+    """
+    Converts an exported sentence and its predictions back into annotations
+
+    NOTE: The most confident frame is used as the frame of the annotation.
+
+    :param data_pair: The sentence and its predictions as a dictionary
+    :return: A pair of the sentence and its annotations
+    """
+
+    sentence = data_pair["sentence"]
+    annotations = []
+
+    for data in data_pair["prediction"]:
+
+        frame = None
+        fee = None
+        position = None
+
+        if not data["frame"] == []:
+            confidence = [i[1] for i in data["frame"]]
+            confidence_max = np.asarray(confidence).argmax()
+
+            frame = data["frame"][confidence_max][0]
+
+        if not data["fee"] == "":
+            fee = data["fee"]  # Frame evoking element
+
+        if not data["position"] == "":
+            position = data["position"]
+            position = (position, position)
+
+        role_positions = []
+        roles = []
+
+        for role_data in data["roles"]:
+            role_positions.append(tuple(role_data["span"]))
+            roles.append(role_data["role"])
+
+        # As this original information is lost, simply equal fee and fee_raw
+        fee_raw = fee
+
+        annotations.append(
+            Annotation(frame, fee, position, fee_raw, sentence, roles, role_positions)
+        )
+
+    return sentence, annotations
+
+
+def iter_jsonl(path: str):
+    """
+    Streams the objects of a JSON Lines file, line by line
+
+    :param path: The path of the (possibly compressed) file
+    :return: A generator of the parsed objects
+    """
+
+    with open_stream(path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 20):
+    """
+    Streams the elements of a json file containing one top-level array (e.g. of export_to_json),
+    without loading the whole document.
+
+    NOTE: Only one element (and one chunk of the file) is held in memory at a time.
+
+    :param path: The path of the (possibly compressed) file
+    :param chunk_size: The number of characters to read at once
+    :return: A generator of the parsed elements
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open_stream(path, "r") as file:
+        buffer = file.read(chunk_size).lstrip()
+
+        if not buffer.startswith("["):
+            raise Exception(f"Expected a json array in {path}")
+
+        pos = 1
+        eof = False
+
+        while True:
+            # Skip the separators between the elements
+            pos = separator.match(buffer, pos).end()
+
+            if buffer.startswith("]", pos):
+                return
+
+            try:
+                element, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise Exception(f"Unexpected end of the json array in {path}")
+
+                # The element is not complete yet, extend the buffer
+                chunk = file.read(max(chunk_size, len(buffer) - pos))
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+
+                continue
+
+            yield element
+
+
+def iter_json_records(path: str):
+    """
+    Streams the sentences of an exported prediction file, as dictionaries.
+
+    NOTE: Both formats are supported, JSON Lines (".jsonl") and the json array.
+
+    :param path: The path of the (possibly compressed) file
+    :return: A generator of the sentences and their predictions as dictionaries
+    """
+
+    if is_jsonl_path(path):
+        return iter_jsonl(path)
+
+    return iter_json_array(path)
+
+
+def iter_json_sentences(path: str):
+    """
+    Streams the sentences of an exported prediction file, with their annotations.
+
+    :param path: The path of the (possibly compressed) file
+    :return: A generator of pairs of a sentence and its annotations
+    """
+
+    for data_pair in iter_json_records(path):
+        yield dict_to_annotations(data_pair)
+
+
+class JsonlWriter(object):
+    """
+    Writes sentences and their predictions as JSON Lines, one sentence at a time
+
+    NOTE: As in the json export, sentences without annotations are skipped.
+    """
+
+    def __init__(self, path: str):
+
+        self.path = path
+        self.file = open_stream(path, "w")
+        self.sentence_count = 0
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def write(self, annotations: List[Annotation]):
+        """
+        Writes the annotations of a single sentence
+
+        :param annotations: The annotations of the sentence
+        :return:
+        """
+
+        if len(annotations) < 1:
+            return
+
+        data_dict = annotations_to_dict(annotations, self.sentence_count)
+
+        self.file.write(json.dumps(data_dict, separators=(",", ":")))
+        self.file.write("\n")
+
+        self.sentence_count += 1
+
+    def write_all(self, sentences_annotations: List[List[Annotation]]):
+        """
+        Writes the annotations of multiple sentences
+
+        :param sentences_annotations: A list (or generator) of the annotations per sentence
+        :return:
+        """
+
+        for annotations in sentences_annotations:
+            self.write(annotations)
+
+    def close(self):
+        """
+        Closes the file
+
+        :return:
+        """
+
+        self.file.close()
+
+
+class JsonWriter(JsonlWriter):
+    """
+    Writes sentences and their predictions as one json array (the format of DataReader.export_to_json),
+    one sentence at a time
+
+    NOTE: The output equals json.dump of the whole array with an indent of 4,
+          without building the array. Without a path, the array is written to stdout.
+    """
+
+    def __init__(self, path: str = None):
+
+        self.path = path
+        self.file = sys.stdout if path is None else open_stream(path, "w")
+        self.sentence_count = 0
+
+    def write(self, annotations: List[Annotation]):
+        """
+        Writes the annotations of a single sentence
+
+        :param annotations: The annotations of the sentence
+        :return:
+        """
+
+        if len(annotations) < 1:
+            return
+
+        data_dict = annotations_to_dict(annotations, self.sentence_count)
+
+        self.file.write("[\n    " if self.sentence_count == 0 else ",\n    ")
+        self.file.write(json.dumps(data_dict, indent=4).replace("\n", "\n    "))
+
+        self.sentence_count += 1
+
+    def close(self):
+        """
+        Completes the array and closes the file
+
+        :return:
+        """
+
+        self.file.write("[]" if self.sentence_count == 0 else "\n]")
+
+        if self.path is None:
+            self.file.write("\n")
+            self.file.flush()
+            return
+
+        self.file.close()
+
+
+def open_writer(path: str = None):
+    """
+    Opens a writer for predictions, the format is chosen by the extension (see is_jsonl_path)
+
+    :param path: The path of the (possibly compressed) file, None for stdout
+    :return: A JsonlWriter for JSON Lines, otherwise a JsonWriter
+    """
+
+    if path is not None and is_jsonl_path(path):
+        return JsonlWriter(path)
+
+    return JsonWriter(path)
@@ -0,0 +1,101 @@
+import numpy as np
+import zlib
+
+from typing import List
+
+
+# The bytes hashed for the key None (0xff never occurs in utf-8)
+none_key = b"\xff"
+
+
+class OOVTable(object):
+    """
+    A fixed table of vectors for out-of-vocabulary words and frames
+
+    Every key is hashed into one row of a preallocated matrix. Therefore a lookup costs no allocation
+    and repeated occurrences of the same key always share the same vector.
+
+    NOTE: The hash (crc32) is deterministic, so the same key gets the same vector in every process.
+    """
+
+    def __init__(
+        self, dim: int = 300, num_buckets: int = 2048, scale: float = 0.1, seed: int = 42
+    ):
+
+        random_state = np.random.RandomState(seed)
+
+        self.vectors = random_state.random_sample((num_buckets, dim)).astype(np.float32)
+        self.vectors *= scale
+
+    def get_row(self, key: str):
+        """
+        Returns the row of the table the given key is hashed to
+
+        NOTE: None (e.g. an annotation without a frame) is hashed as a fixed sentinel,
+              which can not collide with the encoding of any string.
+
+        :param key: The word or frame
+        :return: The index of the row
+        """
+
+        if key is None:
+            return zlib.crc32(none_key) % len(self.vectors)
+
+        return zlib.crc32(key.encode("utf-8")) % len(self.vectors)
+
+    def get_rows(self, keys: List[str]):
+        """
+        Returns the rows of the table the given keys are hashed to
+
+        :param keys: A list of words or frames
+        :return: An array of row indices
+        """
+
+        return np.fromiter(
+            (self.get_row(key) for key in keys), dtype=np.int64, count=len(keys)
+        )
+
+    def check_dim(self, dim: int):
+        """
+        Checks if vectors of the given dimension can be taken from the table
+
+        :param dim: The dimension of the vectors, None for the dimension of the table
+        :return:
+        """
+
+        if dim is not None and dim > self.vectors.shape[1]:
+            raise Exception(
+                f"Requested OOV vectors of dimension {dim}, "
+                f"but the table only has {self.vectors.shape[1]}!"
+            )
+
+    def lookup(self, key: str, dim: int = None):
+        """
+        Returns the vector of a single key
+
+        NOTE: The returned vector is a read-only view into the table!
+
+        :param key: The word or frame
+        :param dim: The dimension of the vector, defaults to the dimension of the table
+        :return: The vector of the key
+        """
+
+        self.check_dim(dim)
+
+        vector = self.vectors[self.get_row(key), :dim]
+        vector.flags.writeable = False
+
+        return vector
+
+    def lookup_batch(self, keys: List[str], dim: int = None):
+        """
+        Returns the vectors of multiple keys
+
+        :param keys: A list of words or frames
+        :param dim: The dimension of the vectors, defaults to the dimension of the table
+        :return: An array of the vectors (one row per key)
+        """
+
+        self.check_dim(dim)
+
+        return self.vectors[self.get_rows(keys), :dim]
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+"""
+Reduced precision storage of embedding matrices
+
+Supported precisions:
+    - "float32": the matrix is kept as it is
+    - "float16": half precision, halves the memory
+    - "int8": every row is scaled into [-127, 127] and rounded, quarters the memory.
+              The scale of each row is kept separately (as float32).
+
+NOTE: Quantized matrices are only stored, every lookup returns dequantized float32 rows.
+"""
+
+
+precisions = ["float32", "float16", "int8"]
+
+
+def check_precision(precision: str):
+    """
+    Checks if the given precision is supported
+
+    :param precision: The precision to check
+    :return:
+    """
+
+    if precision not in precisions:
+        raise Exception(
+            f"Unknown embedding precision: {precision}, use one of {precisions}"
+        )
+
+
+def get_dtype(precision: str):
+    """
+    Returns the numpy dtype used to store a matrix of the given precision
+
+    :param precision: The precision of the matrix
+    :return: The dtype
+    """
+
+    check_precision(precision)
+
+    return np.dtype(precision)
+
+
+def quantize(matrix: np.ndarray, precision: str):
+    """
+    Converts a matrix to the given precision
+
+    :param matrix: The float matrix to convert (one embedding per row)
+    :param precision: The precision to convert to
+    :return: A pair of the converted matrix and the scale of each row (None, if not int8)
+    """
+
+    check_precision(precision)
+
+    if precision != "int8":
+        return matrix.astype(precision), None
+
+    scale = np.abs(matrix).max(axis=1).astype(np.float32) / 127
+    scale[scale == 0] = 1
+
+    quantized = np.rint(matrix / scale[:, None]).astype(np.int8)
+
+    return quantized, scale
+
+
+def dequantize(matrix: np.ndarray, scale: np.ndarray = None):
+    """
+    Converts a (quantized) matrix back to float32
+
+    :param matrix: The matrix to convert
+    :param scale: The scale of each row, None if the matrix is not int8
+    :return: The float32 matrix
+    """
+
+    if scale is None:
+        return np.asarray(matrix, dtype=np.float32)
+
+    return matrix.astype(np.float32) * scale[..., None]
@@ -1,8 +1,89 @@
+from framenet_tools.data_handler.json_stream import is_json_path
 from framenet_tools.data_handler.reader import DataReader
 from framenet_tools.utils.static_utils import get_sentences
 from framenet_tools.config import ConfigManager
 
 
+def iter_paragraph_chunks(path: str, chunk_size: int = 100000):
+    """
+    Reads a text file in chunks of whole paragraphs (separated by empty lines).
+
+    A chunk is completed at the first paragraph boundary after chunk_size characters.
+    Paragraphs longer than four times the chunk_size are split at a line break,
+    otherwise at a whitespace or (if neither exists) hard at four times the chunk_size,
+    so that a chunk always stays below the max_length of spacy.
+
+    NOTE: Lines are read in pieces of at most chunk_size characters,
+          therefore also a file without any line breaks is never read completely.
+
+    :param path: The path of the text file
+    :param chunk_size: The minimal number of characters of a chunk
+    :return: A generator of the chunks
+    """
+
+    limit = 4 * chunk_size
+    lines = []
+    size = 0
+    line_start = True
+
+    with open(path, "r") as file:
+        for line in iter(lambda: file.readline(chunk_size), ""):
+            lines.append(line)
+            size += len(line)
+
+            line_end = line.endswith("\n")
+
+            # An empty line, not only the whitespace of a long one
+            paragraph_end = line_start and line_end and line.strip() == ""
+            line_start = line_end
+
+            if paragraph_end and size >= chunk_size:
+                yield "".join(lines)
+
+                lines = []
+                size = 0
+
+            while size >= limit:
+                text = "".join(lines)
+
+                split = text.rfind("\n", 0, limit) + 1
+
+                if split == 0:
+                    split = limit
+
+                    while split > 0 and not text[split - 1].isspace():
+                        split -= 1
+
+                    if split == 0:
+                        split = limit
+
+                yield text[:split]
+
+                lines = [text[split:]] if split < size else []
+                size -= split
+
+    if lines:
+        yield "".join(lines)
+
+
+def iter_raw_sentences(path: str, use_spacy: bool = False, chunk_size: int = 100000):
+    """
+    Streams the tokenized sentences of a raw text file.
+
+    NOTE: The sentences are split per chunk (see iter_paragraph_chunks),
+          therefore the file is never held in memory completely.
+
+    :param path: The path of the text file
+    :param use_spacy: True to use spacy, otherwise nltk
+    :param chunk_size: The minimal number of characters of a chunk
+    :return: A generator of sentences, consisting of tokens
+    """
+
+    for chunk in iter_paragraph_chunks(path, chunk_size):
+        for sentence in get_sentences(chunk, use_spacy):
+            yield sentence
+
+
 class RawReader(DataReader):
     """
     A reader for raw text files.
@@ -26,20 +107,70 @@ class RawReader(DataReader):
         :return:
         """
 
-        if raw_path.rsplit(".")[-1] == "json":
-            self.import_from_json(raw_path)
+        if raw_path is not None:
+            self.raw_path = raw_path
+
+        if self.raw_path is None:
+            raise Exception("Found no file to read")
+
+        if is_json_path(self.raw_path):
+            self.import_from_json(self.raw_path)
             return
 
+        self.sentences += self.iter_sentences()
+
+        self.loaded(False)
+
+    def iter_sentences(self, raw_path: str = None):
+        """
+        Streams the sentences of a raw text file, without reading it completely.
+
+        NOTE: The sentences are not added to the reader, see read_raw_text for that.
+
+        :param raw_path: The path of the file to read
+        :return: A generator of sentences, consisting of tokens
+        """
+
         if raw_path is not None:
             self.raw_path = raw_path
 
         if self.raw_path is None:
             raise Exception("Found no file to read")
 
-        file = open(raw_path, "r")
-        raw = file.read()
-        file.close()
+        return iter_raw_sentences(self.raw_path, self.cM.use_spacy)
 
-        self.sentences += get_sentences(raw, self.cM.use_spacy)
+    def iter_chunks(self, raw_path: str = None, chunk_size: int = 100000):
+        """
+        Streams a raw text file in chunks of paragraphs (see iter_paragraph_chunks),
+        each chunk is loaded into a reader of its own.
 
-        self.loaded(False)
+        NOTE: json files are imported into a single reader (see read_raw_text).
+
+        :param raw_path: The path of the file to read
+        :param chunk_size: The minimal number of characters of a chunk
+        :return: A generator of readers, containing the sentences of one chunk each
+        """
+
+        if raw_path is not None:
+            self.raw_path = raw_path
+
+        if self.raw_path is None:
+            raise Exception("Found no file to read")
+
+        if is_json_path(self.raw_path):
+            m_reader = RawReader(self.cM, self.raw_path)
+            m_reader.read_raw_text()
+
+            yield m_reader
+            return
+
+        for chunk in iter_paragraph_chunks(self.raw_path, chunk_size):
+            m_reader = RawReader(self.cM, self.raw_path)
+            m_reader.sentences += get_sentences(chunk, self.cM.use_spacy)
+
+            if not m_reader.sentences:
+                continue
+
+            m_reader.loaded(False)
+
+            yield m_reader
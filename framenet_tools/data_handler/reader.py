@@ -1,13 +1,19 @@
-import json
 import logging
 import numpy as np
-import random
 
-from tqdm import tqdm
-from typing import List
+from copy import copy
+from hashlib import blake2b
+from typing import Callable, List
 
 from framenet_tools.config import ConfigManager
 from framenet_tools.data_handler.annotation import Annotation
+from framenet_tools.data_handler.columnar import ColumnarCorpus
+from framenet_tools.data_handler.corpus_cache import CorpusCache
+from framenet_tools.data_handler.json_stream import (
+    JsonlWriter,
+    iter_json_sentences,
+    open_writer,
+)
 from framenet_tools.utils.postagger import PosTagger
 
 
@@ -22,21 +28,87 @@ class DataReader(object):
 
         self.cM = cM
 
+        # The stored fingerprints of the annotations (see get_fingerprint)
+        # NOTE: None marks a changed sentence (or corpus), see mark_changed
+        self.sentence_fingerprints = []
+        self.corpus_fingerprint = None
+
         self.sentences = []
         self.annotations = []
 
         # Embedded
-        self.embedded_sentences = []
+        # NOTE: all sentences are stored in one array, sentence i spans the rows
+        # sentence_offsets[i] up to sentence_offsets[i + 1]
+        self.embedded_sentences = None
+        self.sentence_offsets = None
         self.pos_tags = []
 
+        # The index from the tuple of words to the indices of the sentence
+        # NOTE: Maintained lazily, see update_sentence_index
+        self.sentence_index = dict()
+        self.indexed_sentences = None
+        self.indexed_count = 0
+
+        # The cache entry of the loaded corpus (see load_cached)
+        self.corpus_cache = None
+        self.cache_key = None
+        self.cache_fingerprint = None
+        self.cached_parts = set()
+
         # Flags
         self.is_annotated = None
         self.is_loaded = False
 
+    @property
+    def annotations(self):
+        return self._annotations
+
+    @annotations.setter
+    def annotations(self, annotations: List[List[Annotation]]):
+        self._annotations = annotations
+        self.mark_changed()
+
+    def mark_changed(self, i: int = None):
+        """
+        Marks the annotations of a sentence (or of all sentences) as changed,
+        their fingerprints are computed again on demand.
+
+        NOTE: Replacing the annotations and adding sentences is noticed automatically,
+              changes inside of the annotations of a sentence have to be marked!
+
+        :param i: The index of the sentence, None for all sentences
+        :return:
+        """
+
+        if i is None:
+            self.sentence_fingerprints = []
+        elif i < len(self.sentence_fingerprints):
+            self.sentence_fingerprints[i] = None
+
+        self.corpus_fingerprint = None
+
+    def sync_fingerprints(self):
+        """
+        Helper for aligning the stored fingerprints with the sentences, e.g. after sentences were added
+
+        :return:
+        """
+
+        num_sentences = len(self.annotations)
+        fingerprints = self.sentence_fingerprints
+
+        if not len(fingerprints) == num_sentences:
+            del fingerprints[num_sentences:]
+            fingerprints.extend([None] * (num_sentences - len(fingerprints)))
+
+            self.corpus_fingerprint = None
+
     def __eq__(self, x):
         """
         The overwriting of the comparison function
 
+        NOTE: Compares the stored fingerprints of the corpora (see get_fingerprint)
+
         :param x: Another instance of this class
         :return: True if equal, otherwise false
         """
@@ -44,14 +116,74 @@ class DataReader(object):
         if not len(self.annotations) == len(x.annotations):
             return False
 
-        equal = True
+        return self.get_fingerprint() == x.get_fingerprint()
+
+    def get_sentence_fingerprint(self, i: int):
+        """
+        Returns the fingerprint of the annotations of a single sentence
+
+        NOTE: The fingerprint is stored, until the sentence is marked as changed (see mark_changed).
+
+        :param i: The index of the sentence
+        :return: The blake2b digest (16 bytes)
+        """
+
+        self.sync_fingerprints()
+
+        if self.sentence_fingerprints[i] is None:
+            digest = blake2b(digest_size=16)
+
+            for annotation in self.annotations[i]:
+                digest.update(annotation.get_fingerprint())
 
-        for s_annos, d_annos in zip(self.annotations, x.annotations):
-            for s_anno, d_anno in zip(s_annos, d_annos):
-                if not s_anno == d_anno:
-                    equal = False
+            self.sentence_fingerprints[i] = digest.digest()
 
-        return equal
+        return self.sentence_fingerprints[i]
+
+    def get_fingerprints(self):
+        """
+        Returns the fingerprints of the annotations of all sentences
+
+        :return: A list of fingerprints, one per list of annotations
+        """
+
+        return [self.get_sentence_fingerprint(i) for i in range(len(self.annotations))]
+
+    def get_fingerprint(self):
+        """
+        Returns the fingerprint of all annotations of the corpus
+
+        NOTE: The fingerprint is stored, after a change only the changed sentences are hashed again.
+
+        :return: The blake2b digest (16 bytes)
+        """
+
+        self.sync_fingerprints()
+
+        if self.corpus_fingerprint is None:
+            self.corpus_fingerprint = blake2b(
+                b"".join(self.get_fingerprints()), digest_size=16
+            ).digest()
+
+        return self.corpus_fingerprint
+
+    def diff(self, x):
+        """
+        Compares the annotations with the ones of another reader, sentence by sentence
+
+        NOTE: Sentences only annotated in one of the readers are also reported.
+
+        :param x: Another instance of this class
+        :return: A list of the indices of all sentences with differing annotations
+        """
+
+        own = self.get_fingerprints()
+        other = x.get_fingerprints()
+
+        changed = [i for i, (a, b) in enumerate(zip(own, other)) if a != b]
+        changed += range(min(len(own), len(other)), max(len(own), len(other)))
+
+        return changed
 
     def loaded(self, is_annotated: bool):
         """
@@ -64,134 +196,275 @@ class DataReader(object):
         self.is_loaded = True
         self.is_annotated = is_annotated
 
-    def export_to_json(self, path: str):
+    def to_cache_entry(self):
         """
-        Exports the list of annotations to a json file
+        Converts the loaded corpus into an entry of the corpus cache
+
+        NOTE: POS-tags and frame embeddings are saved in entries of their own (see update_cache).
+              The sentences of the annotations are shared with the sentences of the corpus
+              (also after pickling).
+
+        :return: The entry as a dictionary
+        """
+
+        annotations = [
+            [
+                (
+                    annotation.frame,
+                    annotation.fee,
+                    annotation.position,
+                    annotation.fee_raw,
+                    annotation.sentence,
+                    annotation.roles,
+                    annotation.role_positions,
+                )
+                for annotation in sentence_annotations
+            ]
+            for sentence_annotations in self.annotations
+        ]
+
+        return {"sentences": self.sentences, "annotations": annotations}
+
+    def from_cache_entry(self, entry: dict):
+        """
+        Restores the corpus of an entry of the corpus cache
+
+        NOTE: Cached POS-tags and frame embeddings (optional keys "pos_tags" and "embedded_frames")
+              are only restored if they were created with the current configuration.
 
-        :param path: The path of the json file
+        :param entry: The entry as a dictionary
         :return:
         """
 
-        out_data = []
-        sent_count = 0
+        self.sentences = entry["sentences"]
+        self.annotations = [
+            [Annotation(*annotation) for annotation in annotations]
+            for annotations in entry["annotations"]
+        ]
 
-        for annotations in self.annotations:
-            data_dict = dict()
+        if entry.get("pos_tags") is not None:
+            use_spacy, pos_tags = entry["pos_tags"]
 
-            if len(annotations) < 1:
-                continue
+            if use_spacy == self.cM.use_spacy:
+                self.pos_tags = pos_tags
+                self.cached_parts.add("pos_tags")
 
-            data_dict["sentence"] = annotations[0].sentence
-            data_dict["sentence_id"] = sent_count
-            data_dict["prediction"] = []
+        if entry.get("embedded_frames") is not None:
+            path, frames, embedded = entry["embedded_frames"]
+            annotations = [
+                annotation
+                for sentence_annotations in self.annotations
+                for annotation in sentence_annotations
+            ]
 
-            sent_count += 1
+            if path == self.cM.fEM.path and frames == [a.frame for a in annotations]:
+                for annotation, embedded_frame in zip(annotations, embedded):
+                    annotation.embedded_frame = embedded_frame
 
-            frame_count = 0
+                self.cached_parts.add("embedded_frames")
 
-            for annotation in annotations:
+    def snapshot(self):
+        """
+        Creates a snapshot of the current annotations, e.g. to keep the gold annotations
+        while predicting on this reader.
 
-                prediction_dict = dict()
-                prediction_dict["id"] = frame_count
-                prediction_dict["fee"] = annotation.fee_raw
-                prediction_dict["frame"] = annotation.frame_confidence
-                prediction_dict["position"] = annotation.position[0]
-                prediction_dict["roles"] = []
+        NOTE: Unlike a deepcopy, the sentences, embeddings and POS-tags are shared with the snapshot.
+              Only the annotations are copied (see Annotation.copy), so changing the annotations
+              of this reader (or replacing them) does not affect the snapshot.
+              The snapshot is not connected to the corpus cache.
 
-                role_id = 0
+        :return: The snapshot, a reader of the same type
+        """
 
-                roles = annotation.roles
+        reader = copy(self)
 
-                if not annotation.roles:
-                    roles = ["Default"] * len(annotation.role_positions)
+        reader.sentences = list(self.sentences)
+        reader.annotations = [
+            [annotation.copy() for annotation in sentence_annotations]
+            for sentence_annotations in self.annotations
+        ]
+        reader.pos_tags = list(self.pos_tags)
 
-                for span, role in zip(annotation.role_positions, roles):
+        reader.sentence_index = dict()
+        reader.indexed_sentences = None
+        reader.indexed_count = 0
 
-                    span_dict = dict()
-                    span_dict["role_id"] = role_id
-                    span_dict["role"] = role
-                    span_dict["span"] = span
+        reader.detach_cache()
 
-                    role_id += 1
+        return reader
 
-                    prediction_dict["roles"].append(span_dict)
+    def to_columnar(self):
+        """
+        Converts the loaded corpus into its columnar representation (see ColumnarCorpus)
 
-                data_dict["prediction"].append(prediction_dict)
-                frame_count += 1
+        NOTE: Embeddings and POS-tags are not part of the columnar corpus.
+
+        :return: The columnar corpus
+        """
 
-            out_data.append(data_dict)
+        corpus = ColumnarCorpus()
+        corpus.append_sentences(self.sentences)
+        corpus.set_annotations(self.annotations)
 
-        if path is None:
-            print(out_data)
+        return corpus
+
+    def from_columnar(self, corpus: ColumnarCorpus):
+        """
+        Restores the corpus from its columnar representation (see ColumnarCorpus)
+
+        NOTE: Applying this function removes the previous dataset content.
+              Every sentence gets a (possibly empty) list of annotations.
+
+        :param corpus: The columnar corpus
+        :return:
+        """
+
+        self.sentences = [corpus.get_sentence(i) for i in range(len(corpus))]
+        self.annotations = corpus.create_annotations(self.sentences)
+
+        self.embedded_sentences = None
+        self.sentence_offsets = None
+        self.pos_tags = []
+
+    def load_cached(
+        self, cache: CorpusCache, paths: List[str], read: Callable[[], None]
+    ):
+        """
+        Loads a corpus from the corpus cache, or reads and caches it on a miss.
+
+        NOTE: Only applies to empty readers, otherwise the corpus is simply read.
+
+        :param cache: The corpus cache
+        :param paths: The paths of the source files of the corpus
+        :param read: A function without arguments, reading the corpus into this reader
+        :return:
+        """
+
+        if cache is None or self.sentences:
+            read()
             return
 
-        with open(path, "w") as out:
-            json.dump(out_data, out, indent=4)
+        key = cache.get_key(paths, type(self).__name__)
+        entry = cache.load(key)
 
-    def import_from_json(self, path: str):
+        if entry is None:
+            read()
+            cache.save(key, self.to_cache_entry())
+        else:
+            logging.info(f"Loaded {len(entry['sentences'])} sentences from the cache")
+
+            for part in ["pos_tags", "embedded_frames"]:
+                entry[part] = cache.load(f"{key}.{part}")
+
+            self.from_cache_entry(entry)
+
+        self.corpus_cache = cache
+        self.cache_key = key
+        self.cache_fingerprint = self.get_fingerprint()
+
+    def detach_cache(self):
         """
-        Reads the data from a given json file
+        Disconnects the reader from the cache entry of its corpus, e.g. after changing the annotations
 
-        :param path: The path to the json file
         :return:
         """
 
-        sent_num = 0
+        self.corpus_cache = None
+        self.cache_key = None
+        self.cache_fingerprint = None
+        self.cached_parts = set()
+
+    def update_cache(self):
+        """
+        Adds the current POS-tags and frame embeddings to the cache entry of the corpus.
+
+        NOTE: The cached sentences and annotations are never changed. If the annotations of the reader
+              differ from the cached ones (e.g. by predictions), the reader is detached from the cache.
+              Every part is saved once, in an entry of its own (<key>.pos_tags and <key>.embedded_frames).
+
+        :return:
+        """
 
-        with open(path) as file:
-            json_data = json.load(file)
+        if self.corpus_cache is None:
+            return
 
-        for data_pair in json_data:
+        # NOTE: Hashed again, as unmarked changes must not reach the cache either
+        self.mark_changed()
 
-            self.sentences.append(data_pair["sentence"])
+        if not self.get_fingerprint() == self.cache_fingerprint:
+            logging.debug(f"Annotations changed, detaching from cache entry {self.cache_key}")
+            self.detach_cache()
+            return
 
-            prediction = data_pair["prediction"]
+        if self.pos_tags and "pos_tags" not in self.cached_parts:
+            self.corpus_cache.save(
+                f"{self.cache_key}.pos_tags", (self.cM.use_spacy, self.pos_tags)
+            )
+            self.cached_parts.add("pos_tags")
+
+        annotations = [
+            annotation
+            for sentence_annotations in self.annotations
+            for annotation in sentence_annotations
+        ]
+
+        if (
+            annotations
+            and annotations[0].embedded_frame is not None
+            and "embedded_frames" not in self.cached_parts
+        ):
+            self.corpus_cache.save(
+                f"{self.cache_key}.embedded_frames",
+                (
+                    self.cM.fEM.path,
+                    [annotation.frame for annotation in annotations],
+                    np.stack([annotation.embedded_frame for annotation in annotations]),
+                ),
+            )
+            self.cached_parts.add("embedded_frames")
 
-            for data in prediction:
+    def export_to_json(self, path: str):
+        """
+        Exports the list of annotations to a json file
 
-                frame = None
-                fee = None
-                position = None
+        NOTE: Paths ending with ".jsonl" are exported as JSON Lines,
+              paths ending with ".gz" or ".zst" are compressed (see json_stream).
+              The sentences are written one by one, without building the whole document.
 
-                if not data["frame"] == []:
-                    confidence = [i[1] for i in data["frame"]]
-                    confidence_max = np.asarray(confidence).argmax()
+        :param path: The path of the json file (None to print it)
+        :return:
+        """
 
-                    frame = data["frame"][confidence_max][0]
+        with open_writer(path) as writer:
+            writer.write_all(self.annotations)
 
-                if not data["fee"] == "":
-                    fee = data["fee"]  # Frame evoking element
+    def export_to_jsonl(self, path: str):
+        """
+        Exports the annotations as JSON Lines, one compact json object per sentence.
 
-                if not data["position"] == "":
-                    position = data["position"]
-                    position = (position, position)
+        NOTE: The sentences are written one by one, without building the whole document.
 
-                role_positions = []
-                roles = []
+        :param path: The path of the file
+        :return:
+        """
 
-                for role_data in data["roles"]:
-                    role_positions.append(tuple(role_data["span"]))
-                    roles.append(role_data["role"])
+        with JsonlWriter(path) as writer:
+            writer.write_all(self.annotations)
 
-                # As this original information is lost, simply equal fee and fee_raw
-                fee_raw = fee
+    def import_from_json(self, path: str):
+        """
+        Reads the data from a given json file
 
-                if sent_num >= len(self.annotations):
-                    self.annotations.append([])
+        NOTE: The file is read incrementally, sentence by sentence (see iter_json_sentences).
+              JSON Lines files (see export_to_jsonl) are supported as well.
 
-                self.annotations[sent_num].append(
-                    Annotation(
-                        frame,
-                        fee,
-                        position,
-                        fee_raw,
-                        self.sentences[sent_num],
-                        roles,
-                        role_positions,
-                    )
-                )
+        :param path: The path to the json file
+        :return:
+        """
 
-            sent_num = sent_num + 1
+        for sentence, annotations in iter_json_sentences(path):
+            self.sentences.append(sentence)
+            self.annotations.append(annotations)
 
     def embed_word(self, word: str):
         """
@@ -207,45 +480,86 @@ class DataReader(object):
             embedded = self.cM.wEM.embed(word.lower())
 
         if embedded is None:
-            embedded = [random.random() / 10 for _ in range(300)]
+            embedded = self.cM.oov_table.lookup(word, self.cM.wEM.vectors.shape[1])
 
         return embedded
 
+    def get_vocabulary(self):
+        """
+        Collects all distinct words of the currently loaded sentences.
+
+        :return: A set of words
+        """
+
+        return {word for sentence in self.sentences for word in sentence}
+
     def embed_words(self, force: bool = False):
         """
         Embeds all words of all sentences that are currently saved in "sentences".
 
+        The result is one contiguous float32 array for the whole corpus,
+        the rows of a single sentence can be retrieved via get_embedded_sentence.
+
         NOTE: Can erase all previously embedded data!
 
         :param force: If true, all previously saved embeddings will be overwritten!
         :return:
         """
 
-        # not not - meaning if the list is NOT empty!
-        if not not self.embedded_sentences and not force:
+        if self.embedded_sentences is not None and not force:
             return
 
-        self.cM.wEM.read_word_embeddings()
+        wem = self.cM.wEM
 
-        self.embedded_sentences = []
+        if self.cM.filter_embeddings:
+            wem.read_word_embeddings(self.get_vocabulary())
+        else:
+            wem.read_word_embeddings()
 
         logging.info("Embedding sentences")
 
-        for sentence in tqdm(self.sentences):
-            embedded_sentence = []
+        lengths = [len(sentence) for sentence in self.sentences]
+
+        self.sentence_offsets = np.zeros(len(self.sentences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.sentence_offsets[1:])
+
+        # Look up every distinct word only once
+        distinct_words = dict()
+        token_ids = np.fromiter(
+            (
+                distinct_words.setdefault(word, len(distinct_words))
+                for sentence in self.sentences
+                for word in sentence
+            ),
+            dtype=np.int64,
+            count=int(self.sentence_offsets[-1]),
+        )
 
-            for word in sentence:
-                embedded_sentence.append(self.embed_word(word))
+        embedded, _ = wem.embed_batch(list(distinct_words), self.cM.oov_table)
 
-            self.embedded_sentences.append(embedded_sentence)
+        self.embedded_sentences = embedded[token_ids]
 
         logging.info("[Done] embedding sentences")
 
+    def get_embedded_sentence(self, i: int):
+        """
+        Returns the embeddings of a single sentence
+
+        NOTE: requires embed_words to be called beforehand
+
+        :param i: The index of the sentence
+        :return: An array of the embedded words (one row per word)
+        """
+
+        return self.embedded_sentences[
+            self.sentence_offsets[i] : self.sentence_offsets[i + 1]
+        ]
+
     def embed_frame(self, frame: str):
         """
         Embeds a single frame.
 
-        NOTE: if the embeddings of the frame can not be found, a random set of values is generated.
+        NOTE: if the embeddings of the frame can not be found, the frame's vector of the OOV table is used.
 
         :param frame: The frame to embed
         :return: The embedding of the frame
@@ -254,34 +568,47 @@ class DataReader(object):
         embedded = self.cM.fEM.embed(frame)
 
         if embedded is None:
-            embedded = [random.random() / 6 for _ in range(100)]
+            embedded = self.cM.oov_table.lookup(frame, self.cM.fEM.vectors.shape[1])
 
         return embedded
 
     def embed_frames(self, force: bool = False):
         """
-        Embeds all the sentences that are currently loaded.
+        Embeds all the frames of the annotations that are currently loaded.
 
         NOTE: if forced, overrides embedded data inside of the annotation objects
+        NOTE: all frames are embedded by one gather, each annotation holds a row of the resulting array
 
         :param force: If true, embeddings are generate even if they already exist
         :return:
         """
 
-        if (not self.annotations[0][0].embedded_frame is None) and not force:
+        annotations = [
+            annotation
+            for sentence_annotations in self.annotations
+            for annotation in sentence_annotations
+        ]
+
+        if not annotations:
+            return
+
+        if (not annotations[0].embedded_frame is None) and not force:
             return
 
         self.cM.fEM.read_frame_embeddings()
 
-        logging.info("Embedding sentences")
+        logging.info("Embedding frames")
 
-        for annotations in tqdm(self.annotations):
+        embedded, _ = self.cM.fEM.embed_batch(
+            [annotation.frame for annotation in annotations], self.cM.oov_table
+        )
 
-            for annotation in annotations:
+        for annotation, embedded_frame in zip(annotations, embedded):
+            annotation.embedded_frame = embedded_frame
 
-                annotation.embedded_frame = self.embed_frame(annotation.frame)
+        logging.info("[Done] embedding frames")
 
-        logging.info("[Done] embedding sentences")
+        self.update_cache()
 
     def generate_pos_tags(self, force: bool = False):
         """
@@ -307,17 +634,60 @@ class DataReader(object):
             if len(sentence) != len(tags):
                 count += 1
 
+        self.update_cache()
+
+    def update_sentence_index(self):
+        """
+        Brings the index of the sentences up to date
+
+        NOTE: Only the sentences appended since the last update are indexed,
+              a replaced (or shrunk) list of sentences is indexed again completely.
+              Sentences changed in place are not noticed!
+
+        :return:
+        """
+
+        replaced = self.indexed_sentences is not self.sentences
+
+        if replaced or self.indexed_count > len(self.sentences):
+            self.sentence_index = dict()
+            self.indexed_sentences = self.sentences
+            self.indexed_count = 0
+
+        for i in range(self.indexed_count, len(self.sentences)):
+            self.sentence_index.setdefault(tuple(self.sentences[i]), []).append(i)
+
+        self.indexed_count = len(self.sentences)
+
+    def get_sentence_indices(self, sentence: List[str]):
+        """
+        Returns the indices of all occurrences of a given sentence
+
+        :param sentence: The sentence to look up
+        :return: A list of indices, empty if the sentence is not loaded
+        """
+
+        self.update_sentence_index()
+
+        return list(self.sentence_index.get(tuple(sentence), []))
+
     def get_annotations(self, sentence: List[str] = None):
         """
         Returns the annotation object for a given sentence.
 
+        NOTE: If the sentence occurs multiple times, the annotations of the first occurrence
+              are returned, see get_sentence_indices for all occurrences.
+
         :param sentence: The sentence to retrieve the annotations for.
         :return: A annoation object
         """
 
-        for i in len(self.sentences):
+        indices = self.get_sentence_indices(sentence)
+
+        if not indices:
+            return None
 
-            if self.sentences[i] == sentence:
-                return self.annotations[i]
+        if indices[0] >= len(self.annotations):
+            return []
 
-        return None
+        return self.annotations[indices[0]]
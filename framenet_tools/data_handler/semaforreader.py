@@ -1,8 +1,115 @@
+from itertools import groupby
+from typing import List
+
 from framenet_tools.data_handler.reader import DataReader
 from framenet_tools.config import ConfigManager
 from framenet_tools.data_handler.annotation import Annotation
 
 
+def digest_role_data(element: str):
+    """
+    Parses a string of role information into the desired format
+
+    :param element: The string containing the role data
+    :return: A pair of two concurrent lists containing the roles and their spans
+    """
+
+    roles = []
+    role_positions = []
+
+    element_data = element.split("\t")
+    c = 8
+
+    while len(element_data) > c:
+        role = element_data[c]
+        role_position = element_data[c + 1]
+        if ":" in role_position:
+            role_position = role_position.rsplit(":")
+            role_position = (role_position[0], role_position[1])
+        else:
+            role_position = (role_position, role_position)
+        role_position = (int(role_position[0]), int(role_position[1]))
+
+        role_positions.append(role_position)
+        roles.append(role)
+
+        c += 2
+
+    return roles, role_positions
+
+
+def digest_element(element: str, sentence: List[str]):
+    """
+    Parses a single line of a elements file into an annotation
+
+    :param element: The line of the elements file
+    :param sentence: The words of the annotated sentence
+    :return: The annotation
+    """
+
+    # Element data
+    element_data = element.split("\t")
+
+    frame = element_data[3]  # Frame
+    fee = element_data[4]  # Frame evoking element
+    position = element_data[5].rsplit("_")  # Position of word in sentence
+    position = (int(position[0]), int(position[-1]))
+    fee_raw = element_data[6].rsplit(" ")[0]  # Frame evoking element as it appeared
+
+    roles, role_positions = digest_role_data(element)
+
+    return Annotation(frame, fee, position, fee_raw, sentence, roles, role_positions)
+
+
+def get_sentence_number(element: str):
+    """
+    Returns the sentence number of a line of a elements file
+
+    :param element: The line of the elements file
+    :return: The sentence number (starting at 0)
+    """
+
+    return int(element.split("\t", 8)[7])
+
+
+def iter_semafor_sentences(path_sent: str, path_elements: str):
+    """
+    Streams the sentences and their annotations of the semafor format, line by line.
+
+    NOTE: The elements have to be ordered by their sentence number (as exported by semafor).
+          Sentences without elements get an empty list of annotations.
+
+    :param path_sent: The path to the sentence file
+    :param path_elements: The path to the elements file
+    :return: A generator of pairs, each consisting of the words of a sentence and its annotations
+    """
+
+    with open(path_sent, "r") as sentences, open(path_elements, "r") as elements:
+        elements = (element.rstrip("\n") for element in elements)
+        groups = groupby((e for e in elements if e != ""), key=get_sentence_number)
+
+        group = next(groups, None)
+
+        for sent_num, sentence in enumerate(sentences):
+            words = sentence.rstrip("\n").split(" ")
+
+            while "" in words:
+                words.remove("")
+
+            annotations = []
+
+            if group is not None and group[0] == sent_num:
+                annotations = [digest_element(element, words) for element in group[1]]
+                group = next(groups, None)
+
+            yield words, annotations
+
+        if group is not None:
+            raise Exception(
+                f"Inconsistency: elements of sentence {group[0]} not in order or sentence missing!"
+            )
+
+
 class SemaforReader(DataReader):
     """
     A reader for the Semafor ConLL format
@@ -39,35 +146,15 @@ class SemaforReader(DataReader):
             self.sentences.append(words)
 
         for element in elements:
-            # Element data
-            element_data = element.split("\t")
-
-            frame = element_data[3]  # Frame
-            fee = element_data[4]  # Frame evoking element
-            position = element_data[5].rsplit("_")  # Position of word in sentence
-            position = (int(position[0]), int(position[-1]))
-            fee_raw = element_data[6].rsplit(" ")[
-                0
-            ]  # Frame evoking element as it appeared
-
-            sent_num = int(element_data[7])  # Sentence number
+            sent_num = get_sentence_number(element)
 
             if sent_num >= len(self.annotations):
                 self.annotations.append([])
 
-            roles, role_positions = self.digest_role_data(element)
-
             self.annotations[sent_num].append(
-                Annotation(
-                    frame,
-                    fee,
-                    position,
-                    fee_raw,
-                    self.sentences[sent_num],
-                    roles,
-                    role_positions,
-                )
+                digest_element(element, self.sentences[sent_num])
             )
+            self.mark_changed(sent_num)
 
     def digest_role_data(self, element: str):
         """
@@ -77,28 +164,7 @@ class SemaforReader(DataReader):
         :return: A pair of two concurrent lists containing the roles and their spans
         """
 
-        roles = []
-        role_positions = []
-
-        element_data = element.split("\t")
-        c = 8
-
-        while len(element_data) > c:
-            role = element_data[c]
-            role_position = element_data[c + 1]
-            if ":" in role_position:
-                role_position = role_position.rsplit(":")
-                role_position = (role_position[0], role_position[1])
-            else:
-                role_position = (role_position, role_position)
-            role_position = (int(role_position[0]), int(role_position[1]))
-
-            role_positions.append(role_position)
-            roles.append(role)
-
-            c += 2
-
-        return roles, role_positions
+        return digest_role_data(element)
 
     def read_data(self, path_sent: str = None, path_elements: str = None):
         """
@@ -123,22 +189,36 @@ class SemaforReader(DataReader):
         if self.path_elements is None:
             raise Exception("Found no elements-file to read!")
 
-        with open(self.path_sent, "r") as file:
-            sentences = file.read()
+        self.load_cached(
+            self.cM.corpus_cache, [self.path_sent, self.path_elements], self.read_files
+        )
 
-        with open(self.path_elements, "r") as file:
-            elements = file.read()
+        self.loaded(True)
 
-        sentences = sentences.split("\n")
-        elements = elements.split("\n")
+    def read_files(self):
+        """
+        Reads the sentence and elements file, without using the corpus cache
 
-        # Remove empty line at the end
-        if elements[len(elements) - 1] == "":
-            elements = elements[: len(elements) - 1]
+        :return:
+        """
 
-        if sentences[len(sentences) - 1] == "":
-            sentences = sentences[: len(sentences) - 1]
+        for words, annotations in self.iter_sentences():
+            self.sentences.append(words)
+            self.annotations.append(annotations)
+
+    def iter_sentences(self):
+        """
+        Streams the sentences of the sentence and elements file, without reading them completely.
 
-        self.digest_raw_data(elements, sentences)
+        NOTE: The sentences are not added to the reader, see read_data for that.
 
-        self.loaded(True)
+        :return: A generator of pairs, each consisting of the words of a sentence and its annotations
+        """
+
+        if self.path_sent is None:
+            raise Exception("Found no sentences-file to read!")
+
+        if self.path_elements is None:
+            raise Exception("Found no elements-file to read!")
+
+        return iter_semafor_sentences(self.path_sent, self.path_elements)
@@ -1,13 +1,37 @@
+import bisect
+import logging
+import numpy as np
 import xml.etree.ElementTree
 
-from typing import List
+from multiprocessing import get_context
+from typing import List, Tuple
 
 from framenet_tools.config import ConfigManager
 from framenet_tools.data_handler.annotation import Annotation
 from framenet_tools.data_handler.reader import DataReader
 
 
-def char_pos_to_sentence_pos(start_char: int, end_char: int, words: List[str]):
+def get_char_offsets(words: List[str]):
+    """
+    Creates the prefix-sum table of the character offsets of the words in a sentence.
+
+    NOTE: The table has one more entry than there are words, entry i is the offset of word i.
+
+    :param words: A list of words in a sentence
+    :return: An array of character offsets
+    """
+
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+
+    # +1 due to empty spaces between words
+    np.cumsum([len(word) + 1 for word in words], out=offsets[1:])
+
+    return offsets
+
+
+def char_pos_to_sentence_pos(
+    start_char: int, end_char: int, words: List[str], offsets: np.ndarray = None
+):
     """
     Converts positions of char spans in a sentence into word positions.
 
@@ -16,28 +40,194 @@ def char_pos_to_sentence_pos(start_char: int, end_char: int, words: List[str]):
     :param start_char: The first character of the span
     :param end_char: The last character of the span
     :param words: A list of words in a sentence
+    :param offsets: The character offsets of the words (see get_char_offsets), created if not given
     :return: The start and end position of the WORD in the sentence
     """
 
-    start = -1
-    end = -1
+    if offsets is None:
+        offsets = get_char_offsets(words)
+
+    # The first word starting at or after the start char
+    start = bisect.bisect_left(offsets, start_char)
+
+    # The first word starting after the end char
+    end = bisect.bisect_right(offsets, end_char)
+
+    if end > len(words):
+        raise Exception("Inconsistency: position not inside sentence!")
+
+    if start > end:
+        start = -1
+
+    return start, max(end - 1, start)
+
+
+def char_spans_to_sentence_spans(
+    spans: List[Tuple[int, int]], words: List[str], offsets: np.ndarray = None
+):
+    """
+    Converts a batch of char spans in a sentence into word positions, see char_pos_to_sentence_pos.
+
+    :param spans: A list of pairs of the first and the last character of each span
+    :param words: A list of words in a sentence
+    :param offsets: The character offsets of the words (see get_char_offsets), created if not given
+    :return: A list of the start and end positions of the WORDS in the sentence
+    """
+
+    if offsets is None:
+        offsets = get_char_offsets(words)
+
+    chars = np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+    starts = np.searchsorted(offsets, chars[:, 0], side="left")
+    ends = np.searchsorted(offsets, chars[:, 1], side="right")
+
+    if (ends > len(words)).any():
+        raise Exception("Inconsistency: position not inside sentence!")
+
+    starts[starts > ends] = -1
+    ends = np.maximum(ends - 1, starts)
+
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def digest_sentence(sentence_node: xml.etree.ElementTree.Element):
+    """
+    Parses a single sentence node of the semeval format.
+
+    :param sentence_node: The sentence node
+    :return: A pair of the words of the sentence and a list of its annotations
+    """
+
+    raw_sent = sentence_node.find("text").text
+    words = raw_sent.split(" ")
+
+    while "" in words:
+        words.remove("")
+
+    # The FEE and the role spans of all annotations are converted at once
+    annotation_sets = []
+    spans = []
+
+    for annotation in sentence_node.findall("annotationSets/annotationSet"):
+
+        frame = annotation.get("frameName")
+
+        data = annotation.findall("./layers/layer")
+        fee_node = data[0].findall(".labels/label")
+
+        spans.append((int(fee_node[0].get("start")), int(fee_node[-1].get("end"))))
+
+        roles = []
+
+        for role in data[1:]:
+            for labels in role:
+                for label in labels:
+                    roles.append(label.get("name"))
+                    spans.append((int(label.get("start")), int(label.get("end"))))
+
+        annotation_sets.append((frame, roles))
+
+    positions = char_spans_to_sentence_spans(spans, words)
+    annotations = []
+    i = 0
+
+    for frame, roles in annotation_sets:
+        position = positions[i]
+        role_positions = positions[i + 1 : i + 1 + len(roles)]
+        i += 1 + len(roles)
+
+        fee = words[position[0]]
+        fee_raw = words[position[0]]
+
+        annotations.append(
+            Annotation(frame, fee, position, fee_raw, words, roles, role_positions)
+        )
+
+    return words, annotations
+
+
+def iter_semeval_sentences(path_xml: str):
+    """
+    Incrementally parses a xml file of the semeval format, one sentence at a time.
+
+    NOTE: Every sentence node is removed from the tree after it was parsed,
+          therefore the memory usage does not depend on the size of the file.
+
+    :param path_xml: The path of the xml file
+    :return: A generator of pairs, each consisting of the words of a sentence and its annotations
+    """
+
+    # Structure as define by semeval
+    sentence_path = ["documents", "document", "paragraphs", "paragraph", "sentences"]
+
+    nodes = []
+
+    for event, node in xml.etree.ElementTree.iterparse(
+        path_xml, events=("start", "end")
+    ):
+        if event == "start":
+            nodes.append(node)
+            continue
+
+        nodes.pop()
+
+        if node.tag != "sentence" or [n.tag for n in nodes[1:]] != sentence_path:
+            continue
+
+        yield digest_sentence(node)
+
+        nodes[-1].remove(node)
+
+
+def read_semeval_file(path_xml: str):
+    """
+    Reads a complete xml file of the semeval format.
 
-    chars = 0
+    NOTE: Defined on module level, so it can be used by worker processes.
+
+    :param path_xml: The path of the xml file
+    :return: A pair of the list of sentences and the list of their annotations
+    """
+
+    if path_xml.rsplit(".")[-1] != "xml":
+        raise Exception("File is not a xml-file!")
+
+    sentences = []
+    annotations = []
+
+    for words, sentence_annotations in iter_semeval_sentences(path_xml):
+        sentences.append(words)
+        annotations.append(sentence_annotations)
+
+    return sentences, annotations
+
+
+def iter_semeval_files(paths_xml: List[str], num_workers: int = 1):
+    """
+    Reads multiple xml files of the semeval format, one file per worker process.
+
+    NOTE: The files are returned in the given order.
+          The workers are spawned (not forked), as the calling process may already run torch threads.
+
+    :param paths_xml: The paths of the xml files
+    :param num_workers: The maximum number of processes to use
+    :return: A generator of pairs, each consisting of the sentences and annotations of one file
+    """
 
-    for i in range(len(words) + 1):
-        if start == -1 and start_char <= chars:
-            start = i
+    num_workers = min(num_workers, len(paths_xml))
 
-        if end == -1 and end_char < chars:
-            return start, max(i - 1, start)
+    if num_workers <= 1:
+        for path_xml in paths_xml:
+            yield read_semeval_file(path_xml)
 
-        if i == len(words):
-            break
+        return
 
-        # +1 due to empty spaces between words
-        chars += len(words[i]) + 1
+    logging.debug(f"Reading {len(paths_xml)} files using {num_workers} workers")
 
-    raise Exception("Inconsistency: position not inside sentence!")
+    with get_context("spawn").Pool(num_workers) as pool:
+        for sentences, annotations in pool.imap(read_semeval_file, paths_xml):
+            yield sentences, annotations
 
 
 class SemevalReader(DataReader):
@@ -71,79 +261,59 @@ class SemevalReader(DataReader):
         if self.path_xml.rsplit(".")[-1] != "xml":
             raise Exception("File is not a xml-file!")
 
-        tree = xml.etree.ElementTree.parse(self.path_xml)
-        root = tree.getroot()
+        self.read_files([self.path_xml])
 
-        self.digest_tree(root)
-
-    def digest_tree(self, root: xml.etree.ElementTree):
+    def read_files(self, paths_xml: List[str], num_workers: int = 1):
         """
-        Parses the xml-tree into a DataReader object.
+        Reads multiple xml files in parallel and appends their content in the given order.
 
-        :param root: The root node of the tree
+        NOTE: If the reader is empty, the files are loaded from the corpus cache (if enabled).
+
+        :param paths_xml: The paths of the xml files
+        :param num_workers: The maximum number of processes to use
         :return:
         """
 
-        sent_num = 0
+        def read():
+            for sentences, annotations in iter_semeval_files(paths_xml, num_workers):
+                self.sentences += sentences
+                self.annotations += annotations
 
-        # Structure as define by semeval
-        for sentences in root.findall(
-            ".documents/document/paragraphs/paragraph/sentences/sentence"
-        ):
-            sentence = sentences.find("text").text
-
-            raw_sent = sentence
-            words = raw_sent.split(" ")
-
-            while "" in words:
-                words.remove("")
-            self.sentences.append(words)
-
-            for annotation in sentences.findall("annotationSets/annotationSet"):
+        self.load_cached(self.cM.corpus_cache, paths_xml, read)
 
-                frame = annotation.get("frameName")
+    def iter_sentences(self, path_xml: str = None):
+        """
+        Streams the sentences of a xml file, without loading the whole file into memory.
 
-                data = annotation.findall("./layers/layer")
-                fee_node = data[0].findall(".labels/label")
+        NOTE: The sentences are not added to the reader, see read_data for that.
 
-                start_char = int(fee_node[0].get("start"))
-                end_char = int(fee_node[-1].get("end"))
-                start, end = char_pos_to_sentence_pos(start_char, end_char, words)
+        :param path_xml: The path of the xml file, defaults to the path of the reader
+        :return: A generator of pairs, each consisting of the words of a sentence and its annotations
+        """
 
-                position = (start, end)
+        if path_xml is None:
+            path_xml = self.path_xml
 
-                fee = words[start]
-                fee_raw = words[start]
+        if path_xml is None:
+            raise Exception("Found no xml-file to read!")
 
-                roles = []
-                role_positions = []
+        return iter_semeval_sentences(path_xml)
 
-                for role in data[1:]:
-                    for labels in role:
-                        for label in labels:
-                            fe = label.get("name")
-                            start_char = int(label.get("start"))
-                            end_char = int(label.get("end"))
-                            start, end = char_pos_to_sentence_pos(
-                                start_char, end_char, words
-                            )
+    def digest_tree(self, root: xml.etree.ElementTree):
+        """
+        Parses the xml-tree into a DataReader object.
 
-                            roles.append(fe)
-                            role_positions.append((start, end))
+        NOTE: Every sentence gets a (possibly empty) list of annotations.
 
-                if sent_num >= len(self.annotations):
-                    self.annotations.append([])
+        :param root: The root node of the tree
+        :return:
+        """
 
-                self.annotations[sent_num].append(
-                    Annotation(
-                        frame,
-                        fee,
-                        position,
-                        fee_raw,
-                        self.sentences[sent_num],
-                        roles,
-                        role_positions,
-                    )
-                )
+        # Structure as define by semeval
+        for sentence_node in root.findall(
+            ".documents/document/paragraphs/paragraph/sentences/sentence"
+        ):
+            words, annotations = digest_sentence(sentence_node)
 
-            sent_num += 1
+            self.sentences.append(words)
+            self.annotations.append(annotations)
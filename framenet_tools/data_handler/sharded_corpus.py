@@ -0,0 +1,230 @@
+import bisect
+import json
+import logging
+import numpy as np
+import os
+import re
+
+from typing import List
+
+from framenet_tools.data_handler.columnar import (
+    ColumnarCorpus,
+    array_names,
+    concatenate_corpora,
+)
+from framenet_tools.data_handler.reader import DataReader
+
+
+"""
+Sharded on-disk format of a corpus
+
+A corpus (see ColumnarCorpus) is split into shards of a fixed number of sentences,
+every shard is saved as <directory>/shard_<k>.npz. The tokens and symbols of all shards
+are saved once in <directory>/vocab.json, and <directory>/index.json maps
+the sentences to their shards. The index is written last, a directory without it is incomplete.
+
+Therefore any slice of sentences can be loaded by only reading the shards it overlaps,
+and multiple workers can each process their own shards (see get_worker_shards).
+"""
+
+
+def write_shards(reader: DataReader, directory: str, shard_size: int = 10000):
+    """
+    Writes the sentences and annotations of a reader in the sharded format
+
+    NOTE: Embeddings and POS-tags are not saved.
+
+    :param reader: The reader to save
+    :param directory: The directory of the shards
+    :param shard_size: The number of sentences per shard
+    :return:
+    """
+
+    if shard_size < 1:
+        raise Exception("The shard size has to be positive!")
+
+    corpus = reader.to_columnar()
+
+    os.makedirs(directory, exist_ok=True)
+
+    # NOTE: An existing corpus is invalidated first, the new index is written last
+    index_path = os.path.join(directory, "index.json")
+
+    if os.path.isfile(index_path):
+        os.remove(index_path)
+
+    with open(os.path.join(directory, "vocab.json"), "w") as file:
+        json.dump({"tokens": corpus.tokens, "symbols": corpus.symbols}, file)
+
+    shards = []
+
+    for k, start in enumerate(range(0, len(corpus), shard_size)):
+        end = min(start + shard_size, len(corpus))
+        shard = corpus.get_slice(start, end)
+        name = f"shard_{k}.npz"
+
+        np.savez(
+            os.path.join(directory, name),
+            **{array_name: getattr(shard, array_name) for array_name in array_names},
+        )
+
+        shards.append({"path": name, "start": start, "end": end})
+
+    # Remove the shards of a previous (larger) corpus
+    names = {shard["path"] for shard in shards}
+
+    for name in os.listdir(directory):
+        if re.fullmatch(r"shard_\d+\.npz", name) and name not in names:
+            os.remove(os.path.join(directory, name))
+
+    with open(index_path, "w") as file:
+        json.dump(
+            {"num_sentences": len(corpus), "shard_size": shard_size, "shards": shards},
+            file,
+            indent=4,
+        )
+
+    logging.info(f"Saved {len(corpus)} sentences in {len(shards)} shards")
+
+
+class ShardedCorpus(object):
+    """
+    A corpus in the sharded format, shards are only read on demand
+
+    NOTE: All loaded shards share the vocab of the corpus.
+    """
+
+    def __init__(self, directory: str):
+
+        self.directory = directory
+
+        index_path = os.path.join(directory, "index.json")
+
+        if not os.path.isfile(index_path):
+            raise Exception(f"Found no sharded corpus in {directory}!")
+
+        with open(index_path, "r") as file:
+            index = json.load(file)
+
+        self.num_sentences = index["num_sentences"]
+        self.shard_size = index["shard_size"]
+        self.shards = index["shards"]
+        self.shard_starts = [shard["start"] for shard in self.shards]
+
+        with open(os.path.join(directory, "vocab.json"), "r") as file:
+            vocab = json.load(file)
+
+        # The vocab shared by all shards
+        self.vocab = ColumnarCorpus()
+        self.vocab.tokens = vocab["tokens"]
+        self.vocab.token_ids = {t: i for i, t in enumerate(self.vocab.tokens)}
+        self.vocab.symbols = vocab["symbols"]
+        self.vocab.symbol_ids = {s: i for i, s in enumerate(self.vocab.symbols)}
+
+    def __len__(self):
+
+        return self.num_sentences
+
+    def num_shards(self):
+        """
+        Returns the number of shards
+
+        :return: The number of shards
+        """
+
+        return len(self.shards)
+
+    def get_location(self, i: int):
+        """
+        Returns the location of a sentence
+
+        :param i: The index of the sentence
+        :return: A pair of the shard and the index of the sentence inside of the shard
+        """
+
+        if not 0 <= i < self.num_sentences:
+            raise Exception(f"Sentence {i} is not part of the corpus!")
+
+        k = bisect.bisect_right(self.shard_starts, i) - 1
+
+        return k, i - self.shard_starts[k]
+
+    def load_shard(self, k: int):
+        """
+        Loads a single shard
+
+        :param k: The index of the shard
+        :return: The shard as a ColumnarCorpus
+        """
+
+        shard = ColumnarCorpus()
+        shard.share_vocab(self.vocab)
+
+        with np.load(os.path.join(self.directory, self.shards[k]["path"])) as data:
+            for name in array_names:
+                setattr(shard, name, data[name])
+
+        return shard
+
+    def load_slice(self, start: int, end: int):
+        """
+        Loads the sentences start up to end (exclusive), only reading the overlapped shards
+
+        :param start: The index of the first sentence
+        :param end: The index after the last sentence
+        :return: The slice as a ColumnarCorpus
+        """
+
+        end = min(end, self.num_sentences)
+
+        if start >= end:
+            return self.vocab.get_slice(0, 0)
+
+        first, first_offset = self.get_location(start)
+        last, last_offset = self.get_location(end - 1)
+
+        parts = []
+
+        for k in range(first, last + 1):
+            shard = self.load_shard(k)
+
+            shard_start = first_offset if k == first else 0
+            shard_end = last_offset + 1 if k == last else len(shard)
+
+            parts.append(shard.get_slice(shard_start, shard_end))
+
+        return concatenate_corpora(parts)
+
+    def get_worker_shards(self, worker: int, num_workers: int):
+        """
+        Returns the shards of a worker, the shards of all workers are disjoint
+
+        :param worker: The index of the worker
+        :param num_workers: The number of workers
+        :return: A list of the indices of the shards
+        """
+
+        return list(range(worker, len(self.shards), num_workers))
+
+    def read_into(self, reader: DataReader, shards: List[int] = None):
+        """
+        Loads shards into a reader
+
+        NOTE: Applying this function removes the previous dataset content
+
+        :param reader: The reader to load into
+        :param shards: The indices of the shards to load, all if None
+        :return:
+        """
+
+        if shards is None:
+            shards = range(len(self.shards))
+
+        corpus = self.vocab.get_slice(0, 0)
+        parts = [self.load_shard(k) for k in shards]
+
+        if parts:
+            corpus = concatenate_corpora(parts)
+
+        reader.from_columnar(corpus)
+        reader.loaded(True)
@@ -0,0 +1,87 @@
+from typing import Hashable
+
+
+class SymbolTable(object):
+    """
+    A table of interned symbols (e.g. frame names, roles and FEEs)
+
+    Every distinct symbol is only kept once, all equal symbols passed through intern
+    are replaced by the same object. Therefore millions of annotations only hold references
+    to a few thousand strings.
+
+    Symbols can also be replaced by integer ids (see get_id), e.g. to pack them into arrays.
+    """
+
+    def __init__(self):
+
+        self.symbols = dict()
+
+        # The ids of the symbols and the symbols by id
+        self.ids = dict()
+        self.id_symbols = []
+
+    def __len__(self):
+
+        return len(self.symbols)
+
+    def intern(self, symbol: Hashable):
+        """
+        Returns the shared instance of the given symbol
+
+        :param symbol: The symbol (None is passed through)
+        :return: The shared instance
+        """
+
+        if symbol is None:
+            return None
+
+        return self.symbols.setdefault(symbol, symbol)
+
+    def get_id(self, symbol: Hashable):
+        """
+        Returns the id of the given symbol, a new id is assigned to unknown symbols
+
+        :param symbol: The symbol
+        :return: The id of the symbol, -1 for None
+        """
+
+        if symbol is None:
+            return -1
+
+        symbol_id = self.ids.get(symbol)
+
+        if symbol_id is None:
+            symbol_id = len(self.id_symbols)
+            self.ids[symbol] = symbol_id
+            self.id_symbols.append(self.intern(symbol))
+
+        return symbol_id
+
+    def get_symbol(self, symbol_id: int):
+        """
+        Returns the symbol of the given id
+
+        :param symbol_id: The id of the symbol (see get_id)
+        :return: The symbol, None for -1
+        """
+
+        if symbol_id < 0:
+            return None
+
+        return self.id_symbols[symbol_id]
+
+    def clear(self):
+        """
+        Clears the table
+
+        NOTE: Symbols already interned stay valid, they are simply no longer shared with new ones.
+              The ids are kept, as they are stored by the annotations.
+
+        :return:
+        """
+
+        self.symbols.clear()
+
+
+# The table shared by all annotations of the process
+symbol_table = SymbolTable()
@@ -1,61 +1,290 @@
 import logging
+import numpy as np
+import os
 
 from tqdm import tqdm
-from typing import List
+from typing import List, Set
+
+from framenet_tools.data_handler.embedding_parser import (
+    count_embeddings,
+    iter_embedding_chunks,
+    parse_embedding_file,
+    read_dimension,
+)
+from framenet_tools.data_handler.embedding_store import (
+    create_store_matrix,
+    get_precision_path,
+    get_store_paths,
+    open_store,
+    quantize_store,
+    read_store_scale,
+    store_exists,
+    truncate_store_matrix,
+    write_store_scale,
+    write_store_vocab,
+)
+from framenet_tools.data_handler.oov_table import OOVTable
+from framenet_tools.data_handler.quantization import (
+    dequantize,
+    get_dtype,
+    quantize,
+)
 
 
 class WordEmbeddingManager(object):
     """
     Loads and provides the specified word-embeddings
+
+    NOTE: On first use, the text file is converted into a binary store (see embedding_store),
+          which is then memory-mapped on every following load.
+          If a vocabulary is given on loading, only the embeddings of those words are kept.
+          With binary set to False, the text file is parsed on every load (in parallel).
+          With a precision of "float16" or "int8", the embeddings are stored (on disk and in memory)
+          in reduced precision (see quantization) and dequantized on lookup.
     """
 
-    def __init__(self, path: str = "data/word_embeddings/levy_deps_300.w2vt"):
+    def __init__(
+        self,
+        path: str = "data/word_embeddings/levy_deps_300.w2vt",
+        binary: bool = True,
+        num_workers: int = 1,
+        precision: str = "float32",
+    ):
 
         self.path = path
+        self.binary = binary
+        self.num_workers = num_workers
+        self.precision = precision
+        self.store_path = os.path.splitext(path)[0]
+        self.precision_path = get_precision_path(self.store_path, precision)
+
+        # Mapping of word -> row in vectors
         self.words = None
+        self.vectors = None
 
-    def string_to_array(self, strings: List[str]):
+        # The scale of each row of an int8 matrix, otherwise None
+        self.scale = None
+
+        # The words requested by a filtered load, None if all words are loaded
+        self.vocabulary = None
+
+    def convert_word_embeddings(self):
         """
-        Helper function
-        Converts a string of an array back into an array
+        Converts the text file of the word embeddings into a binary store of the specified precision.
 
-        NOTE: specified for float arrays !!!
+        NOTE: The file is parsed in chunks by num_workers processes,
+              each chunk is written to the store as soon as it is parsed.
 
-        :param strings: The strings of an array
-        :return: The array
+        :return:
         """
 
-        array = []
+        logging.info(f"Converting word embeddings to binary format")
+
+        num_rows = count_embeddings(self.path, "w2v")
+        dim = read_dimension(self.path, "w2v")
+
+        matrix = create_store_matrix(
+            self.precision_path, num_rows, dim, get_dtype(self.precision)
+        )
+        words = []
+        scales = []
+
+        with tqdm(total=num_rows) as progress:
+            for chunk_words, vectors in iter_embedding_chunks(
+                self.path, "w2v", self.num_workers
+            ):
+                vectors, scale = quantize(vectors, self.precision)
+
+                matrix[len(words) : len(words) + len(chunk_words)] = vectors
+                words += chunk_words
+                progress.update(len(chunk_words))
+
+                if scale is not None:
+                    scales.append(scale)
+
+        matrix.flush()
+        del matrix
 
-        for element in strings:
-            array.append(float(element))
+        # NOTE: Invalid lines are counted, but skipped by the parser
+        truncate_store_matrix(self.precision_path, len(words))
 
-        return array
+        if scales:
+            write_store_scale(self.precision_path, np.concatenate(scales))
 
-    def read_word_embeddings(self):
+        write_store_vocab(self.precision_path, words)
+
+        logging.info(f"[Done] converting word embeddings")
+
+    def read_word_embeddings(self, vocabulary: Set[str] = None):
         """
-        Loads the previously specified frame embedding file into a dictionary
+        Loads the previously specified word embeddings
+
+        NOTE: The binary store is created if it does not exist yet.
+              If a vocabulary is given, only the embeddings of these words (and their lowercase
+              versions) are loaded. Further calls with new words extend the loaded embeddings.
+
+        :param vocabulary: The words to load the embeddings for, None to load all words
+        :return:
         """
 
-        if self.words is not None:
+        if vocabulary is not None:
+            self.read_filtered_word_embeddings(vocabulary)
             return
 
-        self.words = dict()
+        if self.words is not None and self.vocabulary is None:
+            return
 
         logging.info("Loading word embeddings")
 
-        with open(self.path, "r") as file:
-            raw = file.read()
+        if not self.binary and not store_exists(self.precision_path):
+            words, vectors = parse_embedding_file(self.path, "w2v", self.num_workers)
+            self.vectors, self.scale = quantize(vectors, self.precision)
+            self.words = {word: row for row, word in enumerate(words)}
+        else:
+            if not store_exists(self.precision_path):
+                if store_exists(self.store_path):
+                    quantize_store(self.store_path, self.precision)
+                else:
+                    self.convert_word_embeddings()
 
-        data = raw.rsplit("\n")[1:]
+            self.words, self.vectors = open_store(self.precision_path)
+            self.scale = read_store_scale(self.precision_path)
 
-        for line in tqdm(data):
-            line = line.rsplit(" ")
-
-            self.words[line[0]] = self.string_to_array(line[1:])
+        self.vocabulary = None
 
         logging.info("[Done] loading word embeddings")
 
+    def read_filtered_word_embeddings(self, vocabulary: Set[str]):
+        """
+        Loads only the embeddings of the given words, by streaming through the embedding source.
+
+        NOTE: Memory usage scales with the size of the given vocabulary, not the embedding vocabulary.
+              With binary set, the binary store is created first (once) and filtered instead of the text file.
+
+        :param vocabulary: The words to load the embeddings for
+        :return:
+        """
+
+        # Everything is loaded already
+        if self.words is not None and self.vocabulary is None:
+            return
+
+        if self.vocabulary is None:
+            self.vocabulary = set()
+
+        wanted = set(vocabulary) | {word.lower() for word in vocabulary}
+        wanted -= self.vocabulary
+
+        if not wanted:
+            if self.words is None:
+                # E.g. an empty corpus, nothing to load but the dimension
+                self.words = dict()
+                self.vectors, self.scale = quantize(
+                    np.zeros((0, self.get_dimension()), dtype=np.float32),
+                    self.precision,
+                )
+
+            return
+
+        logging.info(f"Loading word embeddings for {len(wanted)} words")
+
+        if (
+            self.binary
+            and not store_exists(self.precision_path)
+            and not store_exists(self.store_path)
+        ):
+            self.convert_word_embeddings()
+
+        if store_exists(self.precision_path):
+            words, vectors = self.filter_store(wanted, self.precision_path)
+        elif store_exists(self.store_path):
+            words, vectors = self.filter_store(wanted, self.store_path)
+        else:
+            words, vectors = self.filter_text(wanted)
+
+        vectors, scale = quantize(vectors, self.precision)
+
+        if self.words is None:
+            self.words = dict()
+            self.vectors = vectors[:0]
+            self.scale = None if scale is None else scale[:0]
+
+        for word in words:
+            self.words[word] = len(self.words)
+
+        self.vectors = np.concatenate([self.vectors, vectors])
+
+        if scale is not None:
+            self.scale = np.concatenate([self.scale, scale])
+
+        self.vocabulary |= wanted
+
+        logging.info(f"[Done] loading word embeddings, found {len(words)} words")
+
+    def get_dimension(self):
+        """
+        Returns the dimension of the word embeddings, without loading them
+
+        :return: The dimension
+        """
+
+        for base_path in [self.precision_path, self.store_path]:
+            if store_exists(base_path):
+                matrix_path, _ = get_store_paths(base_path)
+
+                return np.load(matrix_path, mmap_mode="r").shape[1]
+
+        return read_dimension(self.path, "w2v")
+
+    def filter_store(self, wanted: Set[str], base_path: str):
+        """
+        Gathers the embeddings of the wanted words from a binary store.
+
+        :param wanted: The words to gather
+        :param base_path: The base path of the store (of any precision)
+        :return: A pair of the found words and their (float32) embeddings
+        """
+
+        matrix_path, vocab_path = get_store_paths(base_path)
+
+        words = []
+        rows = []
+
+        with open(vocab_path, "r") as file:
+            for row, line in enumerate(file):
+                word = line[:-1]
+
+                if word in wanted:
+                    words.append(word)
+                    rows.append(row)
+
+        matrix = np.load(matrix_path, mmap_mode="r")
+        scale = read_store_scale(base_path)
+
+        if scale is not None:
+            scale = scale[rows]
+
+        return words, dequantize(matrix[rows], scale)
+
+    def filter_text(self, wanted: Set[str]):
+        """
+        Gathers the embeddings of the wanted words by parsing the text file in parallel chunks.
+
+        :param wanted: The words to gather
+        :return: A pair of the found words and their embeddings
+        """
+
+        words, vectors = parse_embedding_file(
+            self.path, "w2v", self.num_workers, wanted
+        )
+
+        if vectors is None:
+            dim = read_dimension(self.path, "w2v")
+
+            return words, np.zeros((0, dim), dtype=np.float32)
+
+        return words, vectors
+
     def embed(self, word: str):
         """
         Converts a given word to its embedding
@@ -65,6 +294,53 @@ class WordEmbeddingManager(object):
         """
 
         if word in self.words:
-            return self.words[word]
+            return self.get_vectors(self.words[word])
 
         return None
+
+    def get_vectors(self, rows: np.ndarray):
+        """
+        Returns the (dequantized) embeddings of the given rows
+
+        :param rows: The rows to gather, or a single row
+        :return: The float32 embeddings
+        """
+
+        if self.scale is None:
+            return dequantize(self.vectors[rows])
+
+        return dequantize(self.vectors[rows], self.scale[rows])
+
+    def embed_batch(self, words: List[str], oov_table: OOVTable = None):
+        """
+        Converts a list of words to their embeddings with a single gather
+
+        NOTE: Words without an embedding fall back to their lowercase version.
+              If that has no embedding either, the vector is taken from the OOV table
+              (or set to zero if none is given).
+
+        :param words: The words to embed
+        :param oov_table: The table to take the vectors of unknown words from
+        :return: A pair of an array of the embeddings (one row per word)
+                 and a boolean mask of the words that have an embedding
+        """
+
+        rows = np.fromiter(
+            (self.words.get(word, -1) for word in words),
+            dtype=np.int64,
+            count=len(words),
+        )
+
+        for i in np.flatnonzero(rows < 0):
+            rows[i] = self.words.get(words[i].lower(), -1)
+
+        found = rows >= 0
+
+        embedded = np.zeros((len(words), self.vectors.shape[1]), dtype=np.float32)
+        embedded[found] = self.get_vectors(rows[found])
+
+        if oov_table is not None and not found.all():
+            missing = [words[i] for i in np.flatnonzero(~found)]
+            embedded[~found] = oov_table.lookup_batch(missing, self.vectors.shape[1])
+
+        return embedded, found
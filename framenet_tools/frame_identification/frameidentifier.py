@@ -1,10 +1,8 @@
 import json
 import logging
 import os
-from copy import deepcopy
 
 import torch
-import torch.nn as nn
 from torch.nn.functional import softmax
 from torchtext import data
 import pickle
@@ -15,7 +13,10 @@ from framenet_tools.data_handler.reader import DataReader
 from framenet_tools.fee_identification.feeidentifier import FeeIdentifier
 from framenet_tools.frame_identification.frameidnetwork import FrameIDNetwork
 from framenet_tools.config import ConfigManager
+from framenet_tools.utils.resource_registry import evict_resource, get_resource
 from framenet_tools.utils.static_utils import shuffle_concurrent_lists
+from framenet_tools.utils.quantized_embedding import create_embedding_layer
+from framenet_tools.utils.vocab_vectors import load_vocab_vectors, quantize_vocab_vectors
 
 
 def get_dataset(reader: DataReader):
@@ -59,6 +60,9 @@ class FrameIdentifier(object):
         self.cM = cM
         self.network = None
 
+        # Created on first use in evaluate_file, then reused
+        self.fee_finder = None
+
     def prepare_dataset(self, xs: List[str], ys: List[str], batch_size: int = None):
         """
         Prepares the dataset and returns a BucketIterator of the dataset
@@ -260,31 +264,54 @@ class FrameIdentifier(object):
         else:
             self.network.save_model(name + ".ph")
 
+        # A previously loaded version of this model is outdated now
+        evict_resource("frameid_model", os.path.abspath(name))
+
     def load_model(self, name: str):
         """
         Loads a model from a given file
 
         NOTE: This drops the current model!
+        NOTE: The model is only read once per process (see resource_registry)
 
         :param name: The path of the model to load
         :return:
         """
 
+        cM, in_voc, out_voc, network = get_resource(
+            "frameid_model", os.path.abspath(name), lambda: self.read_model(name)
+        )
+
+        self.cM = cM
+        self.input_field.vocab = in_voc
+        self.output_field.vocab = out_voc
+        self.network = network
+
+    def read_model(self, name: str):
+        """
+        Reads a model from a given file
+
+        :param name: The path of the model to read
+        :return: A tuple of the config, the input vocab, the output vocab and the network
+        """
+
         # Loading config
-        self.cM = ConfigManager(name + ".cfg")
+        cM = ConfigManager(name + ".cfg")
 
         # Loading Vocabs
         out_voc = pickle.load(open(name + ".out_voc", "rb"))
         in_voc = pickle.load(open(name + ".in_voc", "rb"))
 
-        self.output_field.vocab = out_voc
-        self.input_field.vocab = in_voc
+        num_classes = len(out_voc)
+        # NOTE: Vocabs saved before quantization support have no scale
+        embed = create_embedding_layer(
+            in_voc.vectors, getattr(in_voc, "vectors_scale", None)
+        )
+        network = FrameIDNetwork(cM, embed, num_classes)
 
-        num_classes = len(self.output_field.vocab)
-        embed = nn.Embedding.from_pretrained(self.input_field.vocab.vectors)
-        self.network = FrameIDNetwork(self.cM, embed, num_classes)
+        network.load_model(name + ".ph")
 
-        self.network.load_model(name + ".ph")
+        return cM, in_voc, out_voc, network
 
     def evaluate_file(self, reader: DataReader, predict_fees: bool = False):
         """
@@ -294,11 +321,13 @@ class FrameIdentifier(object):
         :return: A Triple of True Positives, False Positives and False Negatives
         """
 
-        reader_copy = deepcopy(reader)
+        reader_copy = reader.snapshot()
 
         if predict_fees:
-            fee_finder = FeeIdentifier(self.cM)
-            fee_finder.predict_fees(reader)
+            if self.fee_finder is None:
+                self.fee_finder = FeeIdentifier(self.cM)
+
+            self.fee_finder.predict_fees(reader)
 
         xs, ys = get_dataset(reader)
 
@@ -344,11 +373,18 @@ class FrameIdentifier(object):
 
         dev_iter = self.get_iter(reader_dev)
 
-        self.input_field.vocab.load_vectors("glove.6B.300d")
+        if self.cM.filter_embeddings:
+            load_vocab_vectors(self.input_field.vocab, "glove.6B.300d")
+        else:
+            self.input_field.vocab.load_vectors("glove.6B.300d")
+
+        quantize_vocab_vectors(self.input_field.vocab, self.cM.embedding_precision)
 
         num_classes = len(self.output_field.vocab)
 
-        embed = nn.Embedding.from_pretrained(self.input_field.vocab.vectors)
+        embed = create_embedding_layer(
+            self.input_field.vocab.vectors, self.input_field.vocab.vectors_scale
+        )
 
         self.network = FrameIDNetwork(self.cM, embed, num_classes)
 
@@ -61,7 +61,9 @@ def create_argparser():
         "--path", help="A path specification used by some actions.", type=str
     )
     parser.add_argument(
-        "--out_path", help="The path used for saving predictions", type=str
+        "--out_path",
+        help="The path used for saving predictions (JSON Lines, if ending with .jsonl)",
+        type=str,
     )
     parser.add_argument(
         "--use_eval_files",
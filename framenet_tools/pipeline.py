@@ -1,10 +1,10 @@
 import logging
-from copy import deepcopy
 from typing import List
 
 from framenet_tools.config import ConfigManager
+from framenet_tools.data_handler.json_stream import open_writer
 from framenet_tools.data_handler.rawreader import RawReader
-from framenet_tools.data_handler.semevalreader import SemevalReader
+from framenet_tools.data_handler.semevalreader import SemevalReader, iter_semeval_files
 from framenet_tools.evaluator import evaluate_stages
 from framenet_tools.stages.feeID import FeeID
 from framenet_tools.stages.frameID import FrameID
@@ -76,20 +76,21 @@ class Pipeline(object):
         Also only predicts up to the specified level.
 
         NOTE: Prediction is only possible up to the level on which the pipeline was trained!
+        NOTE: The file is predicted in chunks (see RawReader.iter_chunks), the predictions
+              are written chunk by chunk as json or JSON Lines (".jsonl", see json_stream.open_writer).
 
         :param file: The raw input text file
         :param out_path: The path to save the outputs to (can be None)
         :return:
         """
 
-        m_reader = RawReader(self.cM)
+        with open_writer(out_path) as writer:
+            for m_reader in RawReader(self.cM, file).iter_chunks():
 
-        m_reader.read_raw_text(file)
+                for stage in self.stages:
+                    stage.predict(m_reader)
 
-        for stage in self.stages:
-            stage.predict(m_reader)
-
-        m_reader.export_to_json(out_path)
+                writer.write_all(m_reader.annotations)
 
         logging.info(f"Prediction successful!")
 
@@ -97,16 +98,43 @@ class Pipeline(object):
         """
         Helper function for loading datasets.
 
+        NOTE: The files are read in parallel (see cM.num_workers)
+
         :param files: A List of files to load the datasets from.
         :return: A reader object containing the loaded data.
         """
 
         m_data_reader = SemevalReader(self.cM)
-        for file in files:
-            m_data_reader.read_data(file)
+        m_data_reader.read_files(files, self.cM.num_workers)
 
         return m_data_reader
 
+    def iter_datasets(self, files: List[str]):
+        """
+        Helper function for loading every file into its own reader.
+
+        NOTE: With the corpus cache, files are loaded one by one (see load_dataset),
+              otherwise all files are read in parallel, while the first ones are returned already.
+
+        :param files: A List of files to load the datasets from.
+        :return: A generator of pairs of the file and the reader containing its data.
+        """
+
+        if self.cM.corpus_cache is not None:
+            for file in files:
+                yield file, self.load_dataset([file])
+
+            return
+
+        datasets = iter_semeval_files(files, self.cM.num_workers)
+
+        for file, (sentences, annotations) in zip(files, datasets):
+            m_reader = SemevalReader(self.cM, file)
+            m_reader.sentences = sentences
+            m_reader.annotations = annotations
+
+            yield file, m_reader
+
     def evaluate(self):
         """
         Evaluates all the specified stages of the pipeline.
@@ -116,12 +144,13 @@ class Pipeline(object):
         :return:
         """
 
-        for file in self.cM.semeval_dev + self.cM.semeval_test:
+        files = self.cM.semeval_dev + self.cM.semeval_test
+
+        for file, m_reader in self.iter_datasets(files):
 
             logging.info(f"Evaluation on {file}:")
 
-            m_reader = self.load_dataset([file])
-            original_reader = deepcopy(m_reader)
+            original_reader = m_reader.snapshot()
 
             for stage in self.stages:
                 stage.predict(m_reader)
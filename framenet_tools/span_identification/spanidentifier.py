@@ -14,7 +14,14 @@ from framenet_tools.config import ConfigManager
 from framenet_tools.data_handler.annotation import Annotation
 from framenet_tools.data_handler.reader import DataReader
 from framenet_tools.utils.postagger import PosTagger
-from framenet_tools.utils.static_utils import shuffle_concurrent_lists, pos_to_int
+from framenet_tools.utils.resource_registry import evict_resource, get_resource
+from framenet_tools.utils.static_utils import (
+    get_spacy_model,
+    pos_to_int,
+    shuffle_concurrent_lists,
+)
+from framenet_tools.utils.quantized_embedding import create_embedding_layer
+from framenet_tools.utils.vocab_vectors import load_vocab_vectors, quantize_vocab_vectors
 from framenet_tools.span_identification.spanidnetwork import SpanIdNetwork
 
 
@@ -56,9 +63,13 @@ class SpanIdentifier(object):
             dtype=torch.long, use_vocab=True, preprocessing=None
         )
 
-        self.en_nlp = spacy.load("en_core_web_sm")
         self.dep_dict = []
 
+    @property
+    def en_nlp(self):
+        # NOTE: The shared spacy pipeline is only loaded on first use
+        return get_spacy_model()
+
     def query(
         self,
         embedded_sentence: List[float],
@@ -105,7 +116,7 @@ class SpanIdentifier(object):
 
         combined = [
             [self.input_field.vocab.stoi[word]]
-            + annotation.embedded_frame
+            + annotation.embedded_frame.tolist()
             + [pos_to_int(pos_tag[1])]
             + [self.dep_to_int(token.dep_)]
             + [token.head.idx - token.idx]
@@ -151,7 +162,7 @@ class SpanIdentifier(object):
         for token in tokens:
             sentence += " " + token
 
-        doc = self.nlp(sentence)
+        doc = self.en_nlp(sentence)
 
         """
         for token in doc:
@@ -372,7 +383,7 @@ class SpanIdentifier(object):
 
                 combined = [
                     [self.input_field.vocab.stoi[word]]
-                    + annotation.embedded_frame
+                    + annotation.embedded_frame.tolist()
                     + [pos_to_int(pos_tag[1])]
                     + [self.dep_to_int(token.dep_)]
                     + [token.head.idx - token.idx]
@@ -420,28 +431,51 @@ class SpanIdentifier(object):
         # Saving all Vocabs
         pickle.dump(self.input_field.vocab, open(name + ".span.in_voc", "wb"))
 
+        # A previously loaded version of this model is outdated now
+        evict_resource("spanid_model", os.path.abspath(name))
+
     def load_model(self, name: str):
         """
         Loads a model from a given file
 
         NOTE: This drops the current model!
+        NOTE: The model is only read once per process (see resource_registry)
 
         :param name: The path of the model to load
         :return:
         """
 
+        cM, in_voc, network = get_resource(
+            "spanid_model", os.path.abspath(name), lambda: self.read_model(name)
+        )
+
+        self.cM = cM
+        self.input_field.vocab = in_voc
+        self.network = network
+
+    def read_model(self, name: str):
+        """
+        Reads a model from a given file
+
+        :param name: The path of the model to read
+        :return: A triple of the config, the input vocab and the network
+        """
+
         # Loading config
-        self.cM = ConfigManager(name + ".span.cfg")
+        cM = ConfigManager(name + ".span.cfg")
 
         # Loading Vocabs
         in_voc = pickle.load(open(name + ".span.in_voc", "rb"))
 
-        self.input_field.vocab = in_voc
+        # NOTE: Vocabs saved before quantization support have no scale
+        embed = create_embedding_layer(
+            in_voc.vectors, getattr(in_voc, "vectors_scale", None)
+        )
 
-        embed = torch.nn.Embedding.from_pretrained(self.input_field.vocab.vectors)
+        network = SpanIdNetwork(cM, 3, embed)
+        network.load_model("data/models/span_test.m")
 
-        self.network = SpanIdNetwork(self.cM, 3, embed)
-        self.network.load_model("data/models/span_test.m")
+        return cM, in_voc, network
 
     def gen_embedding_layer(self, reader: DataReader):
         """
@@ -472,9 +506,16 @@ class SpanIdentifier(object):
         input_field.build_vocab(dataset)
         output_field.build_vocab(dataset)
 
-        input_field.vocab.load_vectors("glove.6B.300d")
+        if self.cM.filter_embeddings:
+            load_vocab_vectors(input_field.vocab, "glove.6B.300d")
+        else:
+            input_field.vocab.load_vectors("glove.6B.300d")
+
+        quantize_vocab_vectors(input_field.vocab, self.cM.embedding_precision)
 
-        embed = torch.nn.Embedding.from_pretrained(input_field.vocab.vectors)
+        embed = create_embedding_layer(
+            input_field.vocab.vectors, input_field.vocab.vectors_scale
+        )
 
         self.input_field = input_field
 
@@ -531,4 +572,6 @@ class SpanIdentifier(object):
                 annotation.role_positions = p_role_positions
                 annotation.roles = []
 
+            m_reader.mark_changed(i)
+
         logging.info(f"Done predicting Spans")
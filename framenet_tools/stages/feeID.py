@@ -16,6 +16,9 @@ class FeeID(PipelineStage):
     def __init__(self, cM: ConfigManager):
         super().__init__(cM)
 
+        # Created on first use, then reused for every prediction
+        self.fee_finder = None
+
     def train(self, m_reader: DataReader, m_reader_dev: DataReader):
         """
         No training needed
@@ -41,6 +44,7 @@ class FeeID(PipelineStage):
         :return:
         """
 
-        fee_finder = FeeIdentifier(self.cM)
+        if self.fee_finder is None:
+            self.fee_finder = FeeIdentifier(self.cM)
 
-        fee_finder.predict_fees(m_reader)
+        self.fee_finder.predict_fees(m_reader)
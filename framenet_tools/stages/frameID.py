@@ -41,3 +41,5 @@ class FrameID(PipelineStage):
 
                 annotation.frame = frame
                 annotation.frame_confidence = frames
+
+        m_reader.mark_changed()
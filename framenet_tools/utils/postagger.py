@@ -1,11 +1,12 @@
 import logging
 import nltk
-import spacy
 
 from nltk.stem import WordNetLemmatizer
 from nltk.tree import Tree
 from typing import List
 
+from framenet_tools.utils.static_utils import get_spacy_model
+
 
 class PosTagger(object):
     """
@@ -18,11 +19,14 @@ class PosTagger(object):
 
         self.use_spacy = use_spacy
 
-        if self.use_spacy:
-            self.nlp = spacy.load("en_core_web_sm")
-        else:
+        if not self.use_spacy:
             self.lemmatizer = WordNetLemmatizer()
 
+    @property
+    def nlp(self):
+        # NOTE: The shared spacy pipeline is only loaded on first use
+        return get_spacy_model()
+
     def get_tags(self, sentence: List[str]):
         """
         Returns the POS-tags of a given sentence.
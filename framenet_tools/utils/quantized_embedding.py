@@ -0,0 +1,49 @@
+import torch
+import torch.nn as nn
+
+
+class QuantizedEmbedding(nn.Module):
+    """
+    A frozen embedding layer, whose weights are stored in reduced precision (float16 or int8).
+
+    The looked up rows are dequantized to float32 on the fly, therefore the layer can replace
+    nn.Embedding.from_pretrained, while only holding half (float16) or a quarter (int8) of the memory.
+
+    NOTE: For int8 weights, the scale of each row has to be given (see quantization)
+    """
+
+    def __init__(self, weight: torch.Tensor, scale: torch.Tensor = None):
+        super(QuantizedEmbedding, self).__init__()
+
+        self.register_buffer("weight", weight)
+        self.register_buffer("scale", scale)
+
+    def forward(self, input: torch.Tensor):
+        """
+        Looks up and dequantizes the embeddings of the given indices
+
+        :param input: A tensor of indices
+        :return: A float tensor of the embeddings
+        """
+
+        embedded = self.weight[input].float()
+
+        if self.scale is not None:
+            embedded = embedded * self.scale[input].unsqueeze(-1)
+
+        return embedded
+
+
+def create_embedding_layer(vectors: torch.Tensor, scale: torch.Tensor = None):
+    """
+    Creates a frozen embedding layer for the given (possibly quantized) vectors
+
+    :param vectors: The embedding matrix (e.g. vocab.vectors)
+    :param scale: The row scales of an int8 matrix, None otherwise
+    :return: A nn.Embedding for float32 vectors, otherwise a QuantizedEmbedding
+    """
+
+    if vectors.dtype == torch.float32:
+        return nn.Embedding.from_pretrained(vectors)
+
+    return QuantizedEmbedding(vectors, scale)
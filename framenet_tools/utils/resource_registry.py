@@ -0,0 +1,82 @@
+import logging
+
+from typing import Callable
+
+
+"""
+The process-wide resource registry
+
+Holds expensive resources (embedding tables, spacy pipelines, trained models) that should only be
+loaded once per process, no matter how many ConfigManagers, stages or pipelines are created.
+
+Resources are registered by kind (e.g. "spacy") and key (e.g. a resource path or model name).
+NOTE: Resources are kept until they are evicted explicitly!
+"""
+
+
+resources = dict()
+
+
+def get_resource(kind: str, key: str, loader: Callable[[], object]):
+    """
+    Returns a registered resource, if it is not registered yet, it is loaded and registered.
+
+    :param kind: The kind of the resource
+    :param key: The key of the resource (e.g. its path)
+    :param loader: A function without arguments, loading the resource
+    :return: The resource
+    """
+
+    if (kind, key) not in resources:
+        logging.debug(f"Registering {kind}: {key}")
+        resources[(kind, key)] = loader()
+
+    return resources[(kind, key)]
+
+
+def register_resource(kind: str, key: str, resource: object):
+    """
+    Registers a resource, a previously registered resource of the same kind and key is replaced.
+
+    :param kind: The kind of the resource
+    :param key: The key of the resource (e.g. its path)
+    :param resource: The resource to register
+    :return:
+    """
+
+    resources[(kind, key)] = resource
+
+
+def has_resource(kind: str, key: str):
+    """
+    Checks if a resource is registered
+
+    :param kind: The kind of the resource
+    :param key: The key of the resource (e.g. its path)
+    :return: True if the resource is registered, otherwise False
+    """
+
+    return (kind, key) in resources
+
+
+def evict_resource(kind: str = None, key: str = None):
+    """
+    Evicts resources from the registry
+
+    NOTE: If no key is given, all resources of the kind are evicted,
+          if neither is given, the registry is cleared completely.
+
+    :param kind: The kind of the resources to evict
+    :param key: The key of the resource to evict
+    :return:
+    """
+
+    for registered in list(resources.keys()):
+        if kind is not None and registered[0] != kind:
+            continue
+
+        if key is not None and registered[1] != key:
+            continue
+
+        logging.debug(f"Evicting {registered[0]}: {registered[1]}")
+        del resources[registered]
@@ -2,6 +2,7 @@ import logging
 import pickle
 
 import nltk
+import numpy as np
 import random
 import os
 import py7zlib
@@ -11,6 +12,9 @@ import spacy
 from typing import List
 from subprocess import call
 
+from framenet_tools.data_handler.embedding_store import store_exists, write_store
+from framenet_tools.utils.resource_registry import get_resource
+
 
 required_resources = [
     ["taggers/", "averaged_perceptron_tagger"],
@@ -96,31 +100,17 @@ def load_pkl_from_path(str_path_file: str):
     return loaded_pkl
 
 
-def print_dict_to_txt(str_path_file: str, dict_to_print: dict):
-    """
-    Taken from: https://public.ukp.informatik.tu-darmstadt.de/repl4nlp17-frameEmbeddings/reader.py
-
-    :param str_path_file: The path of the dict to save to
-    :param dict_to_print: The dict to save
-    :return:
-    """
-
-    logging.debug(f"Printing to: {str_path_file}")
-
-    with open(str_path_file, "w") as file_out:
-        for key, val in dict_to_print.items():
-            file_out.write("{}\t{}\n".format(key, list(val)))
-
-
 def download_frame_embeddings():
     """
     Checks if the needed frame embeddings are already downloaded, if not they are downloaded.
 
+    NOTE: The downloaded pickle files are directly converted into binary stores (see embedding_store).
+
     :return:
     """
 
     path = "data/frame_embeddings/"
-    files = ["dict_frame_to_emb_50dim_TransE_list.txt", "dict_frame_to_emb_100dim_wsb_list.txt", "dict_frame_to_emb_300dim_w2v_list.txt"]
+    stores = ["dict_frame_to_emb_50dim_TransE", "dict_frame_to_emb_100dim_wsb", "dict_frame_to_emb_300dim_w2v"]
     pkl_files = ["dict_frame_to_emb_50dim_transE_npArray.pkl", "dict_frame_to_emb_100dim_wsb_npArray.pkl", "dict_frame_to_emb_300dim_w2v_npArray.pkl"]
 
     url = "https://public.ukp.informatik.tu-darmstadt.de/repl4nlp17-frameEmbeddings/"
@@ -130,14 +120,18 @@ def download_frame_embeddings():
     if not os.path.isdir(path):
         os.makedirs(path)
 
-    for file, pkl_file in zip(files, pkl_files):
-        if not os.path.isfile(path + file):
-            logging.info(f"Did not find {file}, downloading...")
-            download_file(url + pkl_file, path + pkl_file)
+    for store, pkl_file in zip(stores, pkl_files):
+        if not store_exists(path + store):
+            if not os.path.isfile(path + pkl_file):
+                logging.info(f"Did not find {store}, downloading...")
+                download_file(url + pkl_file, path + pkl_file)
 
             dict_frame_emb = load_pkl_from_path(path + pkl_file)
-            print_dict_to_txt(path + file, dict_frame_emb)
 
+            frames = list(dict_frame_emb.keys())
+            matrix = np.stack([dict_frame_emb[frame] for frame in frames]).astype(np.float32)
+
+            write_store(path + store, frames, matrix)
 
 
 def shuffle_concurrent_lists(l: List[List[object]]):
@@ -220,6 +214,19 @@ def get_spacy_en_model():
     call(["python3", "-m", "spacy", "download", "en_core_web_sm"])
 
 
+def get_spacy_model(name: str = "en_core_web_sm"):
+    """
+    Returns the spacy pipeline of the given model.
+
+    NOTE: The pipeline is only loaded once per process (see resource_registry)
+
+    :param name: The name of the spacy model
+    :return: The spacy pipeline
+    """
+
+    return get_resource("spacy", name, lambda: spacy.load(name))
+
+
 def download(url: str):
     """
     Downloads and extracts a file given as a url.
@@ -264,17 +271,22 @@ def get_sentences_spacy(raw: str):
     :return: A list of sentences, consisting of tokens
     """
 
-    nlp = spacy.load("en_core_web_sm")
+    nlp = get_spacy_model()
     doc = nlp(raw)
-    sents = [sent.string.strip() for sent in doc.sents]
-
-    tokenizer = spacy.tokenizer.Tokenizer(nlp.vocab)
 
     sentences = []
 
-    for sent in sents:
-        tokens = nlp(sent)
-        words = [token.text for token in tokens]
+    # NOTE: The tokens are taken from the segmented doc directly, instead of running
+    # the pipeline again on every sentence. Whitespace around the sentence is dropped.
+    for sent in doc.sents:
+        words = [token.text for token in sent]
+
+        while words and words[0].strip() == "":
+            words.pop(0)
+
+        while words and words[-1].strip() == "":
+            words.pop()
+
         sentences.append(words)
 
     return sentences
@@ -0,0 +1,269 @@
+import logging
+import os
+import torch
+import zipfile
+
+from torchtext.vocab import Vocab
+from typing import Set
+
+from framenet_tools.data_handler.quantization import quantize
+from framenet_tools.utils.static_utils import download_file
+
+
+# The archives containing the pretrained vectors, as used by torchtext
+pretrained_archives = {
+    "glove.42B": "http://nlp.stanford.edu/data/glove.42B.300d.zip",
+    "glove.840B": "http://nlp.stanford.edu/data/glove.840B.300d.zip",
+    "glove.twitter.27B": "http://nlp.stanford.edu/data/glove.twitter.27B.zip",
+    "glove.6B": "http://nlp.stanford.edu/data/glove.6B.zip",
+}
+
+
+def iter_pretrained_vectors(name: str, cache: str = ".vector_cache"):
+    """
+    Streams the lines of a pretrained vector file (e.g. "glove.6B.300d").
+
+    NOTE: If only the archive is present, the lines are read directly from it without extracting.
+          If neither is present, the archive is downloaded into the cache.
+
+    :param name: The name of the pretrained vectors
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return: A generator of the raw lines (as bytes)
+    """
+
+    txt_path = os.path.join(cache, name + ".txt")
+
+    if os.path.isfile(txt_path):
+        with open(txt_path, "rb") as file:
+            for line in file:
+                yield line
+
+        return
+
+    archive_name = name.rsplit(".", 1)[0]
+
+    if archive_name not in pretrained_archives:
+        raise Exception(f"Unknown pretrained vectors: {name}")
+
+    url = pretrained_archives[archive_name]
+    archive_path = os.path.join(cache, url.rsplit("/")[-1])
+
+    if not os.path.isfile(archive_path):
+        if not os.path.isdir(cache):
+            os.makedirs(cache)
+
+        download_file(url, archive_path)
+
+    with zipfile.ZipFile(archive_path) as archive:
+        with archive.open(name + ".txt") as file:
+            for line in file:
+                yield line
+
+
+def get_source_id(name: str, cache: str = ".vector_cache"):
+    """
+    Identifies the source of the pretrained vectors (see iter_pretrained_vectors)
+
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return: The path, size and mtime of the source file, None if it is not present (yet)
+    """
+
+    paths = [os.path.join(cache, name + ".txt")]
+    archive_name = name.rsplit(".", 1)[0]
+
+    if archive_name in pretrained_archives:
+        url = pretrained_archives[archive_name]
+        paths.append(os.path.join(cache, url.rsplit("/")[-1]))
+
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+
+            return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    return None
+
+
+def get_subset_path(name: str, cache: str = ".vector_cache"):
+    """
+    Returns the path of the cached subset of the pretrained vectors
+
+    NOTE: There is one subset per pretrained vectors, shared by all vocabs (e.g. of the
+          frame and the span identification), as their words largely overlap.
+
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return: The path of the subset
+    """
+
+    return os.path.join(cache, "subsets", f"{name}.pt")
+
+
+def load_subset(name: str, cache: str = ".vector_cache"):
+    """
+    Loads the cached subset of the pretrained vectors
+
+    NOTE: A subset gathered from a different source file (e.g. a replaced download) is dropped.
+          Without the source file, the subset is used as it is.
+
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return: The subset (see read_subset), None if there is no valid subset
+    """
+
+    subset_path = get_subset_path(name, cache)
+
+    if not os.path.isfile(subset_path):
+        return None
+
+    subset = torch.load(subset_path)
+    source_id = get_source_id(name, cache)
+
+    if source_id is not None and subset["source"] != source_id:
+        logging.info(f"The source of the cached {name} vectors changed")
+        return None
+
+    return subset
+
+
+def read_subset(name: str, words: Set[str], cache: str = ".vector_cache"):
+    """
+    Streams the pretrained vectors and keeps only the rows of the given words
+
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param words: The words to keep
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return: The subset, a dictionary of the source id, the found words, their vectors
+             and the words without a pretrained vector
+    """
+
+    missing = set(words)
+    found = []
+    rows = []
+    dim = 0
+
+    for line in iter_pretrained_vectors(name, cache):
+        entries = line.rstrip().split(b" ")
+
+        if not dim:
+            dim = len(entries) - 1
+
+        try:
+            word = entries[0].decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+
+        # NOTE: Only the first occurrence of a word is used
+        if word not in missing:
+            continue
+
+        missing.remove(word)
+
+        found.append(word)
+        rows.append(torch.tensor([float(x) for x in entries[1:]]))
+
+    return {
+        "source": get_source_id(name, cache),
+        "words": found,
+        "vectors": torch.stack(rows) if rows else torch.zeros(0, dim),
+        "missing": sorted(missing),
+    }
+
+
+def save_subset(subset: dict, name: str, cache: str = ".vector_cache"):
+    """
+    Saves a subset of the pretrained vectors into the cache
+
+    :param subset: The subset (see read_subset)
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param cache: The directory of the vector cache (same as torchtext)
+    :return:
+    """
+
+    subset_path = get_subset_path(name, cache)
+
+    os.makedirs(os.path.dirname(subset_path), exist_ok=True)
+
+    # Written atomically, an interrupted run must not leave a truncated subset
+    tmp_path = f"{subset_path}.{os.getpid()}.tmp"
+
+    torch.save(subset, tmp_path)
+    os.replace(tmp_path, subset_path)
+
+
+def load_vocab_vectors(
+    vocab: Vocab, name: str, cache: str = ".vector_cache", use_subsets: bool = True
+):
+    """
+    Loads the pretrained vectors for the given vocab, equivalent to vocab.load_vectors(name).
+
+    Instead of loading the complete pretrained table, the vector file is streamed and only
+    rows of words that are part of the vocab are kept. Therefore the memory usage
+    scales with the vocab and not with the pretrained vectors.
+
+    The gathered vectors are saved as a subset in the cache (see get_subset_path).
+    The subset is extended by the words of every vocab, so loading the vectors of a vocab
+    whose words were all looked up before (found or not) only reads this subset.
+
+    NOTE: Words without a pretrained vector are initialized with zeros (torchtext default).
+
+    :param vocab: The vocab to load the vectors for
+    :param name: The name of the pretrained vectors (e.g. "glove.6B.300d")
+    :param cache: The directory of the vector cache (same as torchtext)
+    :param use_subsets: If false, the pretrained vectors are always streamed and no subset is saved
+    :return:
+    """
+
+    # NOTE: torchtext also strips the tokens before the lookup
+    tokens = [token.strip() for token in vocab.itos]
+
+    subset = load_subset(name, cache) if use_subsets else None
+    known = set()
+
+    if subset is not None:
+        known.update(subset["words"])
+        known.update(subset["missing"])
+
+    if subset is not None and known.issuperset(tokens):
+        logging.info(f"Loading cached {name} vectors for {len(tokens)} words")
+    else:
+        logging.info(f"Loading {name} vectors for {len(tokens)} words")
+
+        subset = read_subset(name, known.union(tokens), cache)
+
+        if use_subsets:
+            save_subset(subset, name, cache)
+
+    index = {word: i for i, word in enumerate(subset["words"])}
+    rows = torch.tensor([index.get(token, -1) for token in tokens], dtype=torch.long)
+    found = rows >= 0
+
+    vectors = torch.zeros(len(tokens), subset["vectors"].shape[1])
+    vectors[found] = subset["vectors"][rows[found]]
+
+    vocab.vectors = vectors
+
+    logging.info(
+        f"[Done] loading vectors, found {int(found.sum())}/{len(tokens)} words"
+    )
+
+
+def quantize_vocab_vectors(vocab: Vocab, precision: str):
+    """
+    Converts the vectors of the given vocab to the given precision (see quantization).
+
+    The converted vectors replace vocab.vectors, the row scales of int8 vectors are saved as
+    vocab.vectors_scale (otherwise None). Both are pickled along with the vocab.
+
+    NOTE: Use create_embedding_layer(vocab.vectors, vocab.vectors_scale) to embed with these vectors.
+
+    :param vocab: The vocab whose vectors to convert
+    :param precision: The precision to convert to
+    :return:
+    """
+
+    vectors, scale = quantize(vocab.vectors.numpy(), precision)
+
+    vocab.vectors = torch.from_numpy(vectors)
+    vocab.vectors_scale = None if scale is None else torch.from_numpy(scale)
@@ -0,0 +1,500 @@
+import os
+import random
+import string
+
+import numpy as np
+import pytest
+
+from framenet_tools.data_handler import embedding_parser
+from framenet_tools.data_handler.embedding_parser import iter_embedding_chunks
+from framenet_tools.data_handler.embedding_store import (
+    get_precision_path,
+    get_scale_path,
+    get_store_paths,
+    quantize_store,
+    store_exists,
+)
+from framenet_tools.data_handler.frame_embedding_manager import FrameEmbeddingManager
+from framenet_tools.data_handler.oov_table import OOVTable
+from framenet_tools.data_handler.word_embedding_manager import WordEmbeddingManager
+
+
+def create_random_word(seq_length: int = 8):
+    """
+    Helper function for generation of random words.
+
+    :param seq_length: The maximum length of the word
+    :return: The random word
+    """
+
+    return "".join(
+        random.choice(string.ascii_letters) for _ in range(random.randint(1, seq_length))
+    )
+
+
+def create_word_embedding_file(num_words: int, dim: int):
+    """
+    Helper function for generating a well formatted random ".w2vt" file
+
+    NOTE: Randomized!
+
+    :param num_words: The number of words in the file
+    :param dim: The dimension of each embedding
+    :return: The name of the generated file and the embeddings as a dictionary
+    """
+
+    file_name = create_random_word() + ".w2vt"
+    embeddings = dict()
+
+    while len(embeddings) < num_words:
+        embeddings[create_random_word()] = [round(random.random(), 6) for _ in range(dim)]
+
+    with open(file_name, "w") as file:
+        file.write(f"{num_words} {dim}\n")
+
+        for word, vector in embeddings.items():
+            file.write(word + " " + " ".join(str(x) for x in vector) + "\n")
+
+    return file_name, embeddings
+
+
+def clean_up_embeddings(file_name: str, base_path: str = None):
+    """
+    Deletes a generated embedding file and its binary store.
+
+    :param file_name: The name of the generated file
+    :param base_path: The base path of the binary store, defaults to the file name without extension
+    :return:
+    """
+
+    if base_path is None:
+        base_path = os.path.splitext(file_name)[0]
+
+    paths = [file_name]
+
+    for precision in ["float32", "float16", "int8"]:
+        precision_path = get_precision_path(base_path, precision)
+        paths += get_store_paths(precision_path) + (get_scale_path(precision_path),)
+
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+@pytest.mark.parametrize("num_words, dim", [(1, 1), (10, 5), (100, 300)])
+def test_word_embeddings_binary(num_words: int, dim: int):
+    """
+    Tests if word embeddings are correctly converted to and loaded from the binary store.
+
+    NOTE: Randomized!
+
+    :param num_words: The number of words in the file
+    :param dim: The dimension of each embedding
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(num_words, dim)
+
+    try:
+        wem = WordEmbeddingManager(file_name)
+        wem.read_word_embeddings()
+
+        assert len(wem.words) == num_words
+
+        for word, vector in embeddings.items():
+            assert np.allclose(wem.embed(word), vector)
+
+        assert wem.embed("1") is None
+
+        # A second manager has to reuse the existing store
+        wem = WordEmbeddingManager(file_name)
+        os.remove(file_name)
+        wem.read_word_embeddings()
+
+        for word, vector in embeddings.items():
+            assert np.allclose(wem.embed(word), vector)
+    finally:
+        clean_up_embeddings(file_name)
+
+
+@pytest.mark.parametrize(
+    "use_store, binary", [(True, True), (False, True), (False, False)]
+)
+def test_word_embeddings_filtered(use_store: bool, binary: bool):
+    """
+    Tests if a filtered load only keeps the requested words, and can be extended afterwards.
+
+    NOTE: Randomized!
+
+    :param use_store: Whether the binary store exists beforehand
+    :param binary: Whether to use (and create) the binary store, otherwise the text file is filtered
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(50, 10)
+
+    try:
+        if use_store:
+            WordEmbeddingManager(file_name).convert_word_embeddings()
+
+        words = list(embeddings.keys())
+        vocabulary = set(words[:10] + ["1"])
+
+        wem = WordEmbeddingManager(file_name, binary=binary)
+        wem.read_word_embeddings(vocabulary)
+
+        assert store_exists(wem.precision_path) == (use_store or binary)
+
+        # Lowercase versions of the requested words are loaded as well
+        wanted = vocabulary | {word.lower() for word in vocabulary}
+
+        assert set(wem.words.keys()) == {word for word in words if word in wanted}
+
+        for word in words[:10]:
+            assert np.allclose(wem.embed(word), embeddings[word])
+
+        assert wem.embed("1") is None
+
+        wem.read_word_embeddings(set(words[10:]))
+
+        assert len(wem.words) == len(words)
+
+        for word in words:
+            assert np.allclose(wem.embed(word), embeddings[word])
+    finally:
+        clean_up_embeddings(file_name)
+
+
+@pytest.mark.parametrize("num_workers, chunk_size", [(1, 64), (2, 64), (4, 1024)])
+def test_embedding_chunks(num_workers: int, chunk_size: int):
+    """
+    Tests if a chunked parse yields every embedding exactly once and in the order of the file.
+
+    NOTE: Randomized!
+
+    :param num_workers: The number of processes to use
+    :param chunk_size: The approximate size of a chunk in bytes
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(100, 10)
+
+    try:
+        words = []
+
+        for chunk_words, vectors in iter_embedding_chunks(
+            file_name, "w2v", num_workers, chunk_size=chunk_size
+        ):
+            for word, vector in zip(chunk_words, vectors):
+                assert np.allclose(vector, embeddings[word])
+
+            words += chunk_words
+
+        assert words == list(embeddings.keys())
+    finally:
+        clean_up_embeddings(file_name)
+
+
+def test_embedding_chunks_small_file():
+    """
+    Tests if a file of a single chunk is parsed without a pool of processes.
+
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(10, 10)
+
+    # Creating a pool would fail
+    get_context = embedding_parser.get_context
+    embedding_parser.get_context = None
+
+    try:
+        words = []
+
+        for chunk_words, _ in iter_embedding_chunks(file_name, "w2v", 4):
+            words += chunk_words
+
+        assert words == list(embeddings.keys())
+    finally:
+        embedding_parser.get_context = get_context
+        clean_up_embeddings(file_name)
+
+
+def test_embedding_invalid_lines():
+    """
+    Tests if lines with a wrong number of values or invalid numbers are skipped.
+
+    NOTE: Randomized!
+
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(20, 4)
+
+    with open(file_name, "a") as file:
+        file.write("short 0.1 0.2\n")
+        file.write("broken 0.1 x 0.3 0.4\n")
+        file.write("last 1.0 2.0 3.0 4.0\n")
+
+    embeddings["last"] = [1.0, 2.0, 3.0, 4.0]
+
+    try:
+        words = []
+
+        for chunk_words, vectors in iter_embedding_chunks(file_name, "w2v"):
+            for word, vector in zip(chunk_words, vectors):
+                assert np.allclose(vector, embeddings[word])
+
+            words += chunk_words
+
+        assert words == list(embeddings.keys())
+
+        wem = WordEmbeddingManager(file_name)
+        wem.read_word_embeddings()
+
+        assert len(wem.words) == len(embeddings)
+        assert len(wem.vectors) == len(embeddings)
+        assert np.allclose(wem.embed("last"), embeddings["last"])
+        assert wem.embed("short") is None
+
+        # The store only holds the valid rows, also after quantizing it
+        matrix_path, _ = get_store_paths(wem.store_path)
+
+        assert np.load(matrix_path, mmap_mode="r").shape == (len(embeddings), 4)
+
+        quantize_store(wem.store_path, "int8")
+        matrix_path, _ = get_store_paths(get_precision_path(wem.store_path, "int8"))
+
+        assert np.load(matrix_path, mmap_mode="r").shape == (len(embeddings), 4)
+    finally:
+        clean_up_embeddings(file_name)
+
+
+def test_word_embeddings_text():
+    """
+    Tests if word embeddings are loaded from the text file without creating a binary store.
+
+    NOTE: Randomized!
+
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(50, 10)
+
+    try:
+        wem = WordEmbeddingManager(file_name, binary=False, num_workers=2)
+        wem.read_word_embeddings()
+
+        assert not store_exists(wem.store_path)
+        assert len(wem.words) == len(embeddings)
+
+        for word, vector in embeddings.items():
+            assert np.allclose(wem.embed(word), vector)
+    finally:
+        clean_up_embeddings(file_name)
+
+
+@pytest.mark.parametrize("precision, tolerance", [("float16", 1e-3), ("int8", 1e-2)])
+@pytest.mark.parametrize("convert_first", [True, False])
+def test_word_embeddings_quantized(precision: str, tolerance: float, convert_first: bool):
+    """
+    Tests if word embeddings of reduced precision are stored compactly and dequantized on lookup.
+
+    NOTE: Randomized!
+
+    :param precision: The precision to store the embeddings in
+    :param tolerance: The maximum absolute error of a dequantized value
+    :param convert_first: Whether a float32 store exists beforehand
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(50, 10)
+
+    try:
+        if convert_first:
+            WordEmbeddingManager(file_name).convert_word_embeddings()
+
+        wem = WordEmbeddingManager(file_name, precision=precision)
+        wem.read_word_embeddings()
+
+        assert wem.vectors.dtype == np.dtype(precision)
+
+        for word, vector in embeddings.items():
+            assert wem.embed(word).dtype == np.float32
+            assert np.allclose(wem.embed(word), vector, atol=tolerance)
+
+        words = list(embeddings.keys())
+
+        wem = WordEmbeddingManager(file_name, precision=precision)
+        wem.read_word_embeddings(set(words[:10]))
+
+        assert wem.vectors.dtype == np.dtype(precision)
+
+        rows = np.array([wem.words[word] for word in words[:10]])
+
+        for word, vector in zip(words[:10], wem.get_vectors(rows)):
+            assert np.allclose(vector, embeddings[word], atol=tolerance)
+    finally:
+        clean_up_embeddings(file_name)
+
+
+@pytest.mark.parametrize("binary, precision", [(False, "float32"), (True, "int8")])
+def test_word_embeddings_empty_vocabulary(binary: bool, precision: str):
+    """
+    Tests if filtering for an empty vocabulary (e.g. of an empty corpus) still sets up the embeddings.
+
+    NOTE: Randomized!
+
+    :param binary: Whether to use the binary store
+    :param precision: The precision to load the embeddings in
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(10, 6)
+
+    try:
+        wem = WordEmbeddingManager(file_name, binary=binary, precision=precision)
+        wem.read_word_embeddings(set())
+
+        assert wem.words == dict()
+        assert wem.vectors.shape == (0, 6)
+
+        embedded, found = wem.embed_batch(["unknown"], OOVTable(6))
+
+        assert embedded.shape == (1, 6)
+        assert not found.any()
+    finally:
+        clean_up_embeddings(file_name)
+
+
+def test_word_embed_batch():
+    """
+    Tests if a batch of words is embedded like the single words, including fallbacks.
+
+    NOTE: Randomized!
+
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(50, 10)
+
+    try:
+        wem = WordEmbeddingManager(file_name)
+        wem.read_word_embeddings()
+
+        words = list(embeddings.keys()) + ["1", "2", "1"]
+        words += [word.upper() for word in embeddings if word.islower()]
+
+        oov_table = OOVTable(10)
+        embedded, found = wem.embed_batch(words, oov_table)
+
+        assert embedded.shape == (len(words), 10)
+        assert embedded.dtype == np.float32
+
+        for word, vector, is_found in zip(words, embedded, found):
+            if word in embeddings:
+                assert is_found
+                assert np.allclose(vector, embeddings[word])
+            elif word.lower() in embeddings:
+                assert is_found
+                assert np.allclose(vector, embeddings[word.lower()])
+            else:
+                assert not is_found
+                assert np.array_equal(vector, oov_table.lookup(word))
+
+        # Without a table, unknown words are set to zero
+        embedded, found = wem.embed_batch(["1"])
+
+        assert not found[0]
+        assert not embedded.any()
+    finally:
+        clean_up_embeddings(file_name)
+
+
+def test_oov_table():
+    """
+    Tests if the OOV table returns the same vector for repeated keys, also across instances.
+
+    NOTE: Randomized!
+
+    :return:
+    """
+
+    keys = [create_random_word() for _ in range(100)]
+
+    table = OOVTable(10)
+    other_table = OOVTable(10)
+
+    batch = table.lookup_batch(keys)
+
+    for key, vector in zip(keys, batch):
+        assert np.shares_memory(table.lookup(key), table.vectors)
+        assert np.array_equal(table.lookup(key), vector)
+        assert np.array_equal(other_table.lookup(key), vector)
+        assert np.array_equal(table.lookup(key, 5), vector[:5])
+
+    # Vectors larger than the table can not be returned
+    with pytest.raises(Exception):
+        table.lookup_batch(keys, 11)
+
+    with pytest.raises(Exception):
+        table.lookup(keys[0], 11)
+
+
+def test_oov_table_none():
+    """
+    Tests if a missing key (e.g. an annotation without a frame) gets a fixed vector.
+
+    :return:
+    """
+
+    table = OOVTable(10)
+
+    vector = table.lookup(None)
+
+    assert np.array_equal(vector, OOVTable(10).lookup(None))
+    assert np.array_equal(table.lookup_batch(["a", None, None])[1:], [vector, vector])
+
+
+@pytest.mark.parametrize("num_frames, dim", [(1, 1), (10, 5), (100, 100)])
+def test_frame_embeddings_binary(num_frames: int, dim: int):
+    """
+    Tests if frame embeddings of the former text format are converted and embedded correctly.
+
+    NOTE: Randomized!
+
+    :param num_frames: The number of frames in the file
+    :param dim: The dimension of each embedding
+    :return:
+    """
+
+    base_path = create_random_word()
+    file_name = base_path + "_list.txt"
+    embeddings = dict()
+
+    while len(embeddings) < num_frames:
+        embeddings[create_random_word()] = [round(random.random(), 6) for _ in range(dim)]
+
+    with open(file_name, "w") as file:
+        for frame, vector in embeddings.items():
+            file.write("{}\t{}\n".format(frame, vector))
+
+    try:
+        fem = FrameEmbeddingManager(base_path)
+        fem.read_frame_embeddings()
+
+        # NOTE: None is the frame of annotations without a frame
+        frames = list(embeddings.keys()) + ["1", None]
+        oov_table = OOVTable(dim)
+
+        embedded = fem.embed_many(frames, oov_table)
+
+        for frame, vector in zip(frames, embedded):
+            if frame in embeddings:
+                assert np.allclose(vector, embeddings[frame])
+                assert np.allclose(fem.embed(frame), embeddings[frame])
+            else:
+                assert fem.embed(frame) is None
+                assert np.array_equal(vector, oov_table.lookup(frame))
+    finally:
+        clean_up_embeddings(file_name, base_path)
@@ -1,16 +1,33 @@
+import json
+import numpy as np
 import os
+import pickle
 import pytest
 import random
+import shutil
 import string
+import tracemalloc
+import xml.etree.ElementTree
 from typing import List
 
 from framenet_tools.config import ConfigManager
 from framenet_tools.data_handler.annotation import Annotation
+from framenet_tools.data_handler.corpus_cache import CorpusCache
+from framenet_tools.data_handler.json_stream import iter_json_array, iter_json_sentences
+from framenet_tools.data_handler.oov_table import OOVTable
 from framenet_tools.data_handler.semaforreader import SemaforReader
-from framenet_tools.data_handler.semevalreader import SemevalReader
-from framenet_tools.data_handler.rawreader import RawReader
+from framenet_tools.data_handler.sharded_corpus import ShardedCorpus, write_shards
+from framenet_tools.data_handler.semevalreader import (
+    SemevalReader,
+    char_pos_to_sentence_pos,
+    char_spans_to_sentence_spans,
+)
+from framenet_tools.data_handler.rawreader import RawReader, iter_paragraph_chunks
+from framenet_tools.data_handler.word_embedding_manager import WordEmbeddingManager
+from tests.test_embeddings import clean_up_embeddings, create_word_embedding_file
 
 cM = ConfigManager("config.file")
+cM.corpus_cache = None
 
 
 class RandomFiles(object):
@@ -444,3 +461,778 @@ def test_json_import(use_semafor: bool):
     reader.import_from_json(path)
 
     assert reader == reader_original
+
+
+def test_semeval_streaming():
+    """
+    Tests if the streamed semeval sentences equal the ones of the complete xml-tree.
+
+    :return:
+    """
+
+    tree_reader = SemevalReader(cM)
+    tree_reader.digest_tree(xml.etree.ElementTree.parse("semeval_dummy.xml").getroot())
+
+    reader = SemevalReader(cM, "semeval_dummy.xml")
+    streamed = list(reader.iter_sentences())
+
+    assert [words for words, _ in streamed] == tree_reader.sentences
+    assert [annotations for _, annotations in streamed] == tree_reader.annotations
+
+    # Reading multiple files appends one list of annotations per sentence
+    reader.read_data()
+    reader.read_data()
+
+    assert len(reader.sentences) == 2 * len(tree_reader.sentences)
+    assert len(reader.annotations) == len(reader.sentences)
+    assert reader.annotations[len(tree_reader.sentences):] == tree_reader.annotations
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_semeval_multiple_files(num_workers: int):
+    """
+    Tests if multiple files are read in the given order, also in parallel.
+
+    :param num_workers: The number of processes to use
+    :return:
+    """
+
+    reader = SemevalReader(cM)
+    reader.read_data("semeval_dummy.xml")
+    reader.read_data("semeval_dummy.xml")
+
+    parallel_reader = SemevalReader(cM)
+    parallel_reader.read_files(["semeval_dummy.xml"] * 2, num_workers)
+
+    assert parallel_reader.sentences == reader.sentences
+    assert parallel_reader.annotations == reader.annotations
+
+    # The annotations still refer to the sentences of the reader
+    for sentence, annotations in zip(
+        parallel_reader.sentences, parallel_reader.annotations
+    ):
+        for annotation in annotations:
+            assert annotation.sentence is sentence
+
+
+@pytest.mark.parametrize(
+    "start_char, end_char, expected",
+    [(0, 2, (0, 0)), (4, 6, (1, 1)), (0, 10, (0, 2)), (4, 4, (1, 1)), (8, 13, (2, 3))],
+)
+def test_char_pos_to_sentence_pos(start_char: int, end_char: int, expected: tuple):
+    """
+    Tests the conversion of char spans to word positions, single and batched.
+
+    :param start_char: The first character of the span
+    :param end_char: The last character of the span
+    :param expected: The expected word positions
+    :return:
+    """
+
+    words = ["The", "cat", "sat", "."]
+
+    assert char_pos_to_sentence_pos(start_char, end_char, words) == expected
+    assert char_spans_to_sentence_spans([(start_char, end_char)] * 2, words) == [
+        expected
+    ] * 2
+
+
+def test_char_pos_outside_sentence():
+    """
+    Tests if a span exceeding the sentence is detected.
+
+    :return:
+    """
+
+    with pytest.raises(Exception):
+        char_pos_to_sentence_pos(0, 20, ["The", "cat"])
+
+    with pytest.raises(Exception):
+        char_spans_to_sentence_spans([(0, 1), (0, 20)], ["The", "cat"])
+
+
+def test_corpus_cache():
+    """
+    Tests if a parsed corpus is restored from the cache, and if changed files miss the cache.
+
+    :return:
+    """
+
+    path = "cache_dummy.xml"
+    cache = CorpusCache("test_corpus_cache")
+    reader_cM = ConfigManager("config.file")
+    reader_cM.corpus_cache = cache
+
+    shutil.copyfile("semeval_dummy.xml", path)
+
+    try:
+        reader = SemevalReader(reader_cM)
+        reader.read_data(path)
+
+        assert cache.load(reader.cache_key) is not None
+
+        reader.pos_tags = [["X"] * len(sentence) for sentence in reader.sentences]
+        reader.update_cache()
+
+        cached_reader = SemevalReader(reader_cM)
+        cached_reader.read_data(path)
+
+        assert cached_reader.sentences == reader.sentences
+        assert cached_reader.annotations == reader.annotations
+        assert cached_reader.pos_tags == reader.pos_tags
+
+        for sentence, annotations in zip(
+            cached_reader.sentences, cached_reader.annotations
+        ):
+            for annotation in annotations:
+                assert annotation.sentence is sentence
+
+        # Changed annotations (e.g. predictions) detach the reader instead of updating the entry
+        cached_reader.annotations[0][0].frame = "Predicted"
+
+        for annotations in cached_reader.annotations:
+            for annotation in annotations:
+                annotation.embedded_frame = [0.0, 0.0]
+
+        cached_reader.update_cache()
+
+        assert cached_reader.corpus_cache is None
+        assert cache.load(reader.cache_key + ".embedded_frames") is None
+
+        gold_reader = SemevalReader(reader_cM)
+        gold_reader.read_data(path)
+
+        assert gold_reader.annotations == reader.annotations
+        assert gold_reader.pos_tags == reader.pos_tags
+
+        with open(path, "a") as file:
+            file.write("\n")
+
+        changed_reader = SemevalReader(reader_cM)
+        changed_reader.read_data(path)
+
+        assert changed_reader.cache_key != reader.cache_key
+        assert changed_reader.pos_tags == []
+
+        # Exceeding the size evicts the least recently used entries
+        cache.max_size = 0
+        cache.evict()
+
+        assert cache.load(reader.cache_key) is None
+    finally:
+        os.remove(path)
+        shutil.rmtree("test_corpus_cache")
+
+
+def test_corpus_cache_oversized():
+    """
+    Tests that entries larger than the cache are skipped and the entry just saved is never evicted.
+
+    :return:
+    """
+
+    cache = CorpusCache("test_corpus_cache_oversized", max_size=1)
+
+    try:
+        cache.save("small", [0] * 10)
+
+        # Larger than the whole cache, skipped instead of evicting everything
+        cache.save("oversized", bytes(2 * 1024 * 1024))
+
+        assert cache.load("oversized") is None
+        assert cache.load("small") == [0] * 10
+        assert not [
+            name
+            for name in os.listdir("test_corpus_cache_oversized")
+            if name.endswith(".tmp")
+        ]
+
+        # The entry just saved fits and evicts the older one, not itself
+        cache.save("large", bytes(1024 * 1024 - 32))
+
+        assert cache.load("large") is not None
+        assert cache.load("small") is None
+    finally:
+        shutil.rmtree("test_corpus_cache_oversized")
+
+
+def test_semafor_streaming():
+    """
+    Tests if sentences without elements keep the annotations aligned with the sentences.
+
+    :return:
+    """
+
+    with open("streaming.sentences", "w") as file:
+        file.write("The cat sat .\nNo frames here .\nThe dog ran .\n")
+
+    with open("streaming.frame.elements", "w") as file:
+        file.write("1\t0.0\t1\tAnimals\tcat.n\t1\tcat\t0\tAnimal\t1\n")
+        file.write("1\t0.0\t1\tSelf_motion\trun.v\t2\tran\t2\tSelf_mover\t0:1\n")
+
+    try:
+        reader = SemaforReader(cM, "streaming.sentences", "streaming.frame.elements")
+        streamed = list(reader.iter_sentences())
+
+        assert [words for words, _ in streamed] == [
+            ["The", "cat", "sat", "."],
+            ["No", "frames", "here", "."],
+            ["The", "dog", "ran", "."],
+        ]
+        assert [len(annotations) for _, annotations in streamed] == [1, 0, 1]
+
+        annotation = streamed[2][1][0]
+
+        assert annotation.frame == "Self_motion"
+        assert annotation.sentence is streamed[2][0]
+        assert annotation.role_positions == [(0, 1)]
+    finally:
+        os.remove("streaming.sentences")
+        os.remove("streaming.frame.elements")
+
+
+def test_annotation_compact():
+    """
+    Tests if the compact annotation keeps its values, shares its strings and survives pickling.
+
+    :return:
+    """
+
+    sentence = ["The", "cat", "sat", "."]
+
+    annotation = Annotation(
+        "Animals", "cat.n", None, "cat", sentence, ["Animal"], [(0, 1)]
+    )
+    other = Annotation(
+        "".join(["Anim", "als"]), "cat.n", (1, 1), "cat", sentence, ["Animal"], [(0, 1)]
+    )
+
+    assert annotation.position == (1, 1)
+    assert annotation.role_positions == [(0, 1)]
+    assert annotation.frame_confidence == [["Animals", 1.0]]
+    assert annotation == other
+    assert annotation.frame is other.frame
+
+    other.role_positions = [(0, 1), (3, 3)]
+    other.roles = ["Animal", "Punctuation"]
+
+    assert other.role_positions == [(0, 1), (3, 3)]
+    assert other.position == (1, 1)
+    assert not annotation == other
+
+    copied = pickle.loads(pickle.dumps(other))
+
+    assert copied == other
+    assert copied.sentence == sentence
+    assert copied.roles[0] is other.roles[0]
+
+    # No shared mutable defaults
+    assert Annotation().roles == [] and Annotation().sentence == []
+
+
+class PlainAnnotation(object):
+    """
+    An annotation storing its data in plain attributes, like Annotation did before it became compact
+    """
+
+    def __init__(self, frame, fee, position, fee_raw, sentence, roles, role_positions):
+        self.frame = frame
+        self.fee = fee
+        self.position = position
+        self.fee_raw = fee_raw
+        self.sentence = sentence
+        self.roles = roles
+        self.role_positions = role_positions
+        self.embedded_frame = None
+        self.frame_confidence = [[frame, 1.0]]
+
+
+def measure_annotations(annotation_class: type, num_roles: int, count: int = 2000):
+    """
+    Helper function for measuring the memory of annotations, created as by a parser
+
+    NOTE: Every annotation gets its own strings and lists, the sentence is shared.
+
+    :param annotation_class: The class of the annotations
+    :param num_roles: The number of roles per annotation
+    :param count: The number of annotations to measure
+    :return: The average number of bytes per annotation
+    """
+
+    sentence = ["The", "cat", "sat", "on", "the", "mat", "."]
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    annotations = [
+        annotation_class(
+            "".join(["Anim", "als"]),
+            "".join(["cat", ".n"]),
+            (1, 1),
+            "".join(["c", "at"]),
+            sentence,
+            ["".join(["Role", str(k)]) for k in range(num_roles)],
+            [(k, k + 1) for k in range(num_roles)],
+        )
+        for _ in range(count)
+    ]
+
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    assert len(annotations) == count
+
+    return size / count
+
+
+@pytest.mark.parametrize("num_roles", [1, 3])
+def test_annotation_memory(num_roles: int):
+    """
+    Tests if a compact annotation takes at most a third of the memory of a plain one.
+
+    :param num_roles: The number of roles per annotation
+    :return:
+    """
+
+    compact = measure_annotations(Annotation, num_roles)
+    plain = measure_annotations(PlainAnnotation, num_roles)
+
+    assert plain / compact >= 3
+
+
+def test_columnar_roundtrip():
+    """
+    Tests the conversion into the columnar corpus and back.
+
+    :return:
+    """
+
+    m_reader = SemevalReader(cM)
+    sentences = [["The", "cat", "sat", "."], ["Nothing", "here"], ["A", "cat"]]
+
+    m_reader.sentences = sentences
+    m_reader.annotations = [
+        [
+            Annotation(
+                "Animals", "cat.n", (1, 1), "cat", sentences[0], ["Animal"], [(0, 1)]
+            ),
+            Annotation(
+                "Posture", "sit.v", (2, 2), "sat", sentences[0], [], [(0, 1), (3, 3)]
+            ),
+        ],
+        [],
+        [Annotation("Animals", None, (1, 1), "cat", sentences[2], [], [])],
+    ]
+
+    corpus = m_reader.to_columnar()
+
+    assert len(corpus) == 3
+    assert corpus.num_annotations() == 3
+    assert corpus.get_sentence(2) == ["A", "cat"]
+    assert list(corpus.annotation_sentences) == [0, 0, 2]
+    assert list(corpus.get_annotation_range(1)) == []
+    assert list(corpus.role_offsets) == [0, 1, 3, 3]
+    assert corpus.frame_ids[0] == corpus.frame_ids[2]
+    assert corpus.fee_ids[2] == -1
+    fee_tokens = [corpus.tokens[t] for t in corpus.get_fee_token_ids()]
+    assert fee_tokens == ["cat", "sat", "cat"]
+
+    restored = SemevalReader(cM)
+    restored.from_columnar(corpus)
+
+    assert restored.sentences == m_reader.sentences
+    assert restored == m_reader
+    assert restored.annotations[0][1].roles == []
+    assert restored.annotations[2][0].fee is None
+    assert restored.annotations[0][0].sentence is restored.sentences[0]
+
+
+def test_columnar_roles():
+    """
+    Tests if the roles stay aligned with their spans in the columnar corpus.
+
+    :return:
+    """
+
+    m_reader = SemevalReader(cM)
+    sentence = ["A", "cat", "sat", "."]
+
+    m_reader.sentences = [sentence]
+    m_reader.annotations = [
+        [
+            # More roles than spans, the extra role is dropped
+            Annotation("F1", None, (1, 1), "cat", sentence, ["X", "Y"], [(0, 0)]),
+            # A role None in the middle of the roles
+            Annotation(
+                "F2", None, (2, 2), "sat", sentence, [None, "B"], [(0, 0), (1, 1)]
+            ),
+            Annotation("F3", None, (2, 2), "sat", sentence, ["C"], [(3, 3)]),
+        ]
+    ]
+
+    corpus = m_reader.to_columnar()
+
+    assert len(corpus.role_ids) == len(corpus.role_spans) == 4
+
+    restored = SemevalReader(cM)
+    restored.from_columnar(corpus)
+
+    annotations = restored.annotations[0]
+
+    assert annotations[0].roles == ["X"]
+    assert annotations[1].roles == [None, "B"]
+    assert annotations[1].role_positions == [(0, 0), (1, 1)]
+    assert annotations[2].roles == ["C"]
+    assert annotations[2].role_positions == [(3, 3)]
+
+
+def test_get_annotations():
+    """
+    Tests the lookup of annotations by sentence, including duplicates and appended sentences.
+
+    :return:
+    """
+
+    m_reader = SemevalReader(cM)
+    m_reader.sentences = [["a", "b"], ["c"], ["a", "b"]]
+    m_reader.annotations = [[Annotation("A")], [], [Annotation("B")]]
+
+    assert m_reader.get_sentence_indices(["a", "b"]) == [0, 2]
+    assert m_reader.get_annotations(["a", "b"])[0].frame == "A"
+    assert m_reader.get_annotations(["c"]) == []
+    assert m_reader.get_annotations(["d"]) is None
+
+    m_reader.sentences.append(["d"])
+    m_reader.annotations.append([Annotation("D")])
+
+    assert m_reader.get_annotations(["d"])[0].frame == "D"
+
+    m_reader.sentences = [["c"]]
+
+    assert m_reader.get_sentence_indices(["a", "b"]) == []
+    assert m_reader.get_sentence_indices(["c"]) == [0]
+
+
+def test_reader_diff():
+    """
+    Tests the fingerprint comparison and the diff of two readers.
+
+    :return:
+    """
+
+    sentences = [["a", "cat"], ["b"], ["c", "dog"]]
+
+    readers = []
+
+    for _ in range(2):
+        m_reader = SemevalReader(cM)
+        m_reader.sentences = sentences
+        m_reader.annotations = [
+            [Annotation("Animals", "cat.n", (1, 1), "cat", sentences[0])],
+            [],
+            [
+                Annotation(
+                    "Animals", "dog.n", (1, 1), "dog", sentences[2], ["A"], [(0, 0)]
+                )
+            ],
+        ]
+        readers.append(m_reader)
+
+    original, changed = readers
+
+    assert original == changed
+    assert original.diff(changed) == []
+
+    # The fingerprints are stored until the annotations are marked as changed
+    fingerprint = changed.get_fingerprint()
+
+    assert changed.get_fingerprint() is fingerprint
+
+    changed.annotations[0] = [Annotation("Animals", "cat.n", (1, 1), "cat", sentences[0])]
+    changed.mark_changed(0)
+
+    assert changed.get_fingerprint() is not fingerprint
+    assert changed.get_fingerprint() == fingerprint
+
+    changed.annotations[2][0].role_positions = [(0, 1)]
+    changed.mark_changed(2)
+
+    assert not original == changed
+    assert original.diff(changed) == [2]
+
+    changed.annotations[2][0].role_positions = [(0, 0)]
+    changed.annotations[1].append(
+        Annotation("Letters", None, (0, 0), "b", sentences[1])
+    )
+    changed.mark_changed(2)
+    changed.mark_changed(1)
+
+    # Added sentences are noticed without marking them
+    changed.annotations.append([])
+
+    assert original.diff(changed) == [1, 3]
+    assert not original == changed
+
+    # Annotations compare their values, also of sentences changed in place
+    words = ["a", "cat"]
+    annotation = Annotation("Animals", "cat.n", (1, 1), "cat", words)
+    other = Annotation("Animals", "cat.n", (1, 1), "cat", list(words))
+
+    assert annotation == other
+
+    words[0] = "the"
+
+    assert not annotation == other
+
+
+def test_reader_snapshot():
+    """
+    Tests if a snapshot keeps the annotations, while the reader is changed by predictions.
+
+    :return:
+    """
+
+    sentences = [["a", "cat"], ["the", "dog"]]
+
+    m_reader = SemevalReader(cM)
+    m_reader.sentences = sentences
+    m_reader.annotations = [
+        [
+            Annotation(
+                "Animals", "cat.n", (1, 1), "cat", sentences[0], ["A"], [(0, 0)]
+            )
+        ],
+        [Annotation("Animals", "dog.n", (1, 1), "dog", sentences[1])],
+    ]
+
+    snapshot = m_reader.snapshot()
+
+    assert snapshot == m_reader
+    assert type(snapshot) is SemevalReader
+    assert snapshot.sentences[0] is sentences[0]
+    assert snapshot.annotations[0][0].sentence is sentences[0]
+
+    m_reader.annotations[0][0].frame = "Predicted"
+    m_reader.annotations[0][0].position = (0, 0)
+    m_reader.annotations[1] = []
+    m_reader.mark_changed()
+
+    assert snapshot.annotations[0][0].frame == "Animals"
+    assert snapshot.annotations[0][0].position == (1, 1)
+    assert snapshot.annotations[0][0].role_positions == [(0, 0)]
+    assert len(snapshot.annotations[1]) == 1
+    assert snapshot.diff(m_reader) == [0, 1]
+
+
+@pytest.mark.parametrize("path", ["test.jsonl", "test.jsonl.gz"])
+def test_jsonl_export(path: str):
+    """
+    Tests the streaming JSON Lines export and its import.
+
+    :param path: The path to export to
+    :return:
+    """
+
+    reader_original = read_and_export(path, True)
+
+    try:
+        reader = RawReader(cM)
+        reader.import_from_json(path)
+
+        assert reader == reader_original
+        assert len(reader.sentences) == len(reader.annotations)
+    finally:
+        os.remove(path)
+
+
+def test_json_streaming():
+    """
+    Tests the incremental import of the json array format.
+
+    :return:
+    """
+
+    path = "streaming.json"
+
+    reader_original = read_and_export(path, True)
+
+    try:
+        with open(path) as file:
+            json_data = json.load(file)
+
+        # The incrementally written array equals the dump of the whole array
+        with open(path) as file:
+            assert file.read() == json.dumps(json_data, indent=4)
+
+        # A small chunk size splits the elements across multiple reads
+        assert list(iter_json_array(path, 16)) == json_data
+
+        streamed = list(iter_json_sentences(path))
+
+        assert [sentence for sentence, _ in streamed] == [
+            data_pair["sentence"] for data_pair in json_data
+        ]
+        assert [annotations for _, annotations in streamed] == [
+            annotations for annotations in reader_original.annotations if annotations
+        ]
+    finally:
+        os.remove(path)
+
+
+def test_paragraph_chunks():
+    """
+    Tests if raw text files are chunked at paragraph boundaries, without losing any text.
+
+    :return:
+    """
+
+    path = "chunks.txt"
+    paragraphs = ["First line.\nSecond line.\n", "Another one.\n", "Last.\n"]
+
+    with open(path, "w") as file:
+        file.write("\n".join(paragraphs))
+
+    try:
+        chunks = list(iter_paragraph_chunks(path, 10))
+
+        assert "".join(chunks) == "\n".join(paragraphs)
+        assert chunks[0] == paragraphs[0] + "\n"
+        assert chunks[-1] == paragraphs[-1]
+
+        assert list(iter_paragraph_chunks(path, 1000)) == ["\n".join(paragraphs)]
+
+        # Without line breaks, the text is split at whitespaces, otherwise at the hard limit
+        with open("chunks_long.txt", "w") as file:
+            file.write("word " * 100 + "x" * 100)
+
+        long_chunks = list(iter_paragraph_chunks("chunks_long.txt", 10))
+
+        assert "".join(long_chunks) == "word " * 100 + "x" * 100
+        assert all(len(chunk) <= 40 for chunk in long_chunks)
+        assert all(chunk.endswith(" ") for chunk in long_chunks if "word" in chunk)
+        assert long_chunks[-1] == "x" * 20
+
+        # Every chunk is loaded into a reader of its own, e.g. for streamed predictions
+        readers = list(RawReader(cM).iter_chunks(path, 10))
+
+        assert len(readers) == len(chunks)
+        assert [
+            sentence for m_reader in readers for sentence in m_reader.sentences
+        ] == list(RawReader(cM).iter_sentences(path))
+    finally:
+        os.remove(path)
+
+        if os.path.isfile("chunks_long.txt"):
+            os.remove("chunks_long.txt")
+
+
+def test_sharded_corpus():
+    """
+    Tests the sharded corpus: loading slices and disjoint shards of workers.
+
+    :return:
+    """
+
+    directory = "shards_test"
+
+    reader = SemevalReader(cM)
+    reader.sentences = [[f"word{i}", "cat", f"{i}"] for i in range(7)]
+    reader.annotations = [
+        [
+            Annotation(f"Frame{i}", "cat.n", (1, 1), "cat", sentence, ["A"], [(0, 0)])
+            for _ in range(i % 3)
+        ]
+        for i, sentence in enumerate(reader.sentences)
+    ]
+
+    try:
+        write_shards(reader, directory, 3)
+
+        corpus = ShardedCorpus(directory)
+
+        assert len(corpus) == 7
+        assert corpus.num_shards() == 3
+        assert corpus.get_location(4) == (1, 1)
+
+        sliced = SemevalReader(cM)
+        sliced.from_columnar(corpus.load_slice(2, 7))
+
+        assert sliced.sentences == reader.sentences[2:]
+        assert sliced.annotations == reader.annotations[2:]
+        assert len(corpus.load_slice(4, 4)) == 0
+
+        shards = [corpus.get_worker_shards(worker, 2) for worker in range(2)]
+
+        assert shards == [[0, 2], [1]]
+
+        worker_reader = SemevalReader(cM)
+        corpus.read_into(worker_reader, shards[1])
+
+        assert worker_reader.sentences == reader.sentences[3:6]
+
+        restored = SemevalReader(cM)
+        corpus.read_into(restored)
+
+        assert restored.sentences == reader.sentences
+        assert restored == reader
+
+        # Rewriting a smaller corpus removes the shards of the previous one
+        reader.sentences = reader.sentences[:2]
+        reader.annotations = reader.annotations[:2]
+
+        write_shards(reader, directory, 1)
+
+        assert sorted(os.listdir(directory)) == [
+            "index.json",
+            "shard_0.npz",
+            "shard_1.npz",
+            "vocab.json",
+        ]
+        assert len(ShardedCorpus(directory)) == 2
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_embed_words():
+    """
+    Tests the contiguous word embeddings of a reader, including empty sentences and unknown words.
+
+    NOTE: Randomized!
+
+    :return:
+    """
+
+    file_name, embeddings = create_word_embedding_file(20, 10)
+    words = list(embeddings)
+
+    shared_wem, shared_oov_table = cM.wEM, cM.oov_table
+    cM.wEM = WordEmbeddingManager(file_name, binary=False)
+    cM.oov_table = OOVTable(10)
+
+    try:
+        m_reader = SemevalReader(cM)
+        m_reader.sentences = [
+            [words[0], "unknown_a", words[1]],
+            [],
+            ["unknown_a", words[2], "unknown_b"],
+        ]
+        m_reader.embed_words()
+
+        assert m_reader.sentence_offsets.tolist() == [0, 3, 3, 6]
+        assert m_reader.embedded_sentences.shape == (6, 10)
+        assert m_reader.embedded_sentences.dtype == np.float32
+
+        first, empty, last = [m_reader.get_embedded_sentence(i) for i in range(3)]
+
+        assert first.shape == (3, 10)
+        assert empty.shape == (0, 10)
+        assert np.allclose(first[0], embeddings[words[0]])
+        assert np.allclose(first[2], embeddings[words[1]])
+        assert np.allclose(last[1], embeddings[words[2]])
+
+        # Repeated unknown words get the same vector of the OOV table
+        assert np.array_equal(first[1], last[0])
+        assert not np.array_equal(last[0], last[2])
+    finally:
+        cM.wEM, cM.oov_table = shared_wem, shared_oov_table
+        clean_up_embeddings(file_name)
@@ -80,6 +80,7 @@ def adjust_config(simple_mode: bool):
         cM.train_files = train_files
 
     cM.num_epochs = 1
+    cM.use_corpus_cache = False
 
     cM.semeval_all = cM.semeval_train + cM.semeval_dev + cM.semeval_test
 
@@ -176,6 +177,26 @@ def test_eval_all():
     eval_args(create_argparser(), ["evaluate"])
 
 
+def test_eval_feeid_parallel():
+    """
+    Tests the evaluation with the datasets read by multiple worker processes.
+
+    NOTE: The corpus cache is disabled, therefore the files are read in parallel.
+
+    :return:
+    """
+
+    num_workers = cM.num_workers
+    cM.num_workers = 2
+    cM.create_config("config.file")
+
+    try:
+        eval_args(create_argparser(), ["evaluate", "--feeid"])
+    finally:
+        cM.num_workers = num_workers
+        cM.create_config("config.file")
+
+
 @pytest.mark.parametrize("run", range(N))
 def test_predict_feeid(run: int):
     """
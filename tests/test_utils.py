@@ -1,16 +1,29 @@
 import logging
 import os
 import pytest
+import shutil
+import torch
+
+from collections import Counter
+from torchtext.vocab import Vocab
 
 from typing import List
 
 from framenet_tools.evaluator import calc_f
+from framenet_tools.utils.resource_registry import (
+    evict_resource,
+    get_resource,
+    has_resource,
+)
 from framenet_tools.utils.static_utils import (
     shuffle_concurrent_lists,
     extract7z,
     download_file,
     get_sentences,
+    get_sentences_spacy,
+    get_spacy_model,
 )
+from framenet_tools.utils.vocab_vectors import get_subset_path, load_vocab_vectors
 
 
 @pytest.mark.parametrize(
@@ -121,3 +134,112 @@ def test_tokenization(use_spacy: bool):
     tokenized = get_sentences(text, use_spacy)
 
     assert tokenized == sentences
+
+
+def test_tokenization_spacy_whitespace():
+    """
+    Tests if the tokens of the segmented doc equal the tokens of every sentence tokenized on its own,
+    for text containing line breaks and additional spaces.
+
+    NOTE: requires spacy.
+
+    :return:
+    """
+
+    text = (
+        "  The cat sat on the mat.  It was  very happy.\n"
+        "The dog\nbarked loudly!   \n\n  Then it slept.\t"
+    )
+
+    nlp = get_spacy_model()
+
+    # The previous tokenization, running the pipeline again on every stripped sentence
+    expected = [
+        [token.text for token in nlp(sent.text.strip())] for sent in nlp(text).sents
+    ]
+
+    assert get_sentences_spacy(text) == expected
+
+
+def test_resource_registry():
+    """
+    Tests if resources are only loaded once and can be evicted explicitly.
+
+    :return:
+    """
+
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    resource = get_resource("test", "a", loader)
+
+    assert get_resource("test", "a", loader) is resource
+    assert len(loads) == 1
+
+    get_resource("test", "b", loader)
+    evict_resource("test", "a")
+
+    assert not has_resource("test", "a")
+    assert has_resource("test", "b")
+    assert get_resource("test", "a", loader) is not resource
+    assert len(loads) == 3
+
+    evict_resource("test")
+
+    assert not has_resource("test", "a")
+    assert not has_resource("test", "b")
+
+
+def test_vocab_vector_subsets():
+    """
+    Tests if the vectors of a vocab are cached, so that the pretrained vectors are not needed again.
+
+    :return:
+    """
+
+    cache = "test_vector_cache"
+    name = "glove.test.3d"
+
+    os.makedirs(cache, exist_ok=True)
+
+    with open(os.path.join(cache, name + ".txt"), "w") as file:
+        file.write("the 1 2 3\ncat 4 5 6\ndog 7 8 9\n")
+
+    try:
+        vocab = Vocab(Counter(["the", "cat", "bird"]))
+        load_vocab_vectors(vocab, name, cache)
+
+        assert os.path.isfile(get_subset_path(name, cache))
+
+        # Another vocab extends the shared subset
+        other_vocab = Vocab(Counter(["dog"]))
+        load_vocab_vectors(other_vocab, name, cache)
+
+        assert other_vocab.vectors[other_vocab.stoi["dog"]].tolist() == [7, 8, 9]
+
+        os.remove(os.path.join(cache, name + ".txt"))
+
+        # Every word was looked up before, the subset suffices
+        cached_vocab = Vocab(Counter(["cat", "dog", "bird"]))
+        load_vocab_vectors(cached_vocab, name, cache)
+
+        assert cached_vocab.vectors[cached_vocab.stoi["cat"]].tolist() == [4, 5, 6]
+        assert cached_vocab.vectors[cached_vocab.stoi["dog"]].tolist() == [7, 8, 9]
+        assert cached_vocab.vectors[cached_vocab.stoi["bird"]].tolist() == [0, 0, 0]
+        assert torch.equal(
+            cached_vocab.vectors[cached_vocab.stoi["cat"]], vocab.vectors[vocab.stoi["cat"]]
+        )
+
+        # A changed source file invalidates the subset
+        with open(os.path.join(cache, name + ".txt"), "w") as file:
+            file.write("cat 0 0 1\n")
+
+        changed_vocab = Vocab(Counter(["cat"]))
+        load_vocab_vectors(changed_vocab, name, cache)
+
+        assert changed_vocab.vectors[changed_vocab.stoi["cat"]].tolist() == [0, 0, 1]
+    finally:
+        shutil.rmtree(cache)